@@ -6,9 +6,9 @@ import numpy as np
 import matplotlib.pyplot as plt
 import pandas as pd
 from orbit_determination.model import Satrec
-from orbit_determination.conveniences import jday_datetime
-from datetime import datetime, timedelta
-from astropy.time import Time
+from orbit_determination.timegrid import TimeGrid
+from frames import earth_orientation, teme_to_ecef
+from datetime import datetime
 from astropy.coordinates import TEME, GCRS
 from astropy import units as u
 from astropy.coordinates import CartesianRepresentation, CartesianDifferential
@@ -16,65 +16,62 @@ from astropy.coordinates import ITRS
 
 def SGP4propagate(start_datetime, duration_minutes, timestep, tle_line1, tle_line2, frame):
     satellite = Satrec.twoline2rv(tle_line1, tle_line2)
-    
-    steps = int((duration_minutes * 60) / timestep)
-    time_list = [start_datetime + timedelta(seconds=i * timestep) for i in range(steps)]
 
-    orbit_data = []
-
-    for minute in time_list:
-        jd, fr = jday_datetime(minute)
-        e, r, v = satellite.sgp4(jd, fr) 
-        if e != 0:
-            print(f"Propagation error at {minute} (code {e})")
-            continue
-
-        t = Time(minute, scale='utc')
-        r_teme = np.array(r, dtype=float).reshape(3) * u.km
-        v_teme = np.array(v, dtype=float).reshape(3) * u.km / u.s
-
-        if frame == "TEME":
-            orbit_data.append({
-                'datetime': minute,
-                'x_km': r_teme[0].value,
-                'y_km': r_teme[1].value,
-                'z_km': r_teme[2].value,
-                'vx_kms': v_teme[0].value,
-                'vy_kms': v_teme[1].value,
-                'vz_kms': v_teme[2].value
-            })
-
-        elif frame in ["GCRS", "ITRS"]:
-            r_cart = CartesianRepresentation(r_teme)
-            v_diff = CartesianDifferential(v_teme)
-            r_full = r_cart.with_differentials(v_diff)
-
-            teme_coord = TEME(r_full, obstime=t)
-            gcrs_coord = teme_coord.transform_to(GCRS(obstime=t))
-
-            if frame == "GCRS":
-                pos = gcrs_coord.cartesian.xyz.to_value(u.km)
-                vel = gcrs_coord.velocity.d_xyz.to_value(u.km/u.s)
-
-            elif frame == "ITRS":
-                itrs_coord = gcrs_coord.transform_to(ITRS(obstime=t))
-                pos = itrs_coord.cartesian.xyz.to_value(u.km)
-                vel = itrs_coord.velocity.d_xyz.to_value(u.km/u.s)
-
-            orbit_data.append({
-                'datetime': minute,
-                'x_km': pos[0],
-                'y_km': pos[1],
-                'z_km': pos[2],
-                'vx_kms': vel[0],
-                'vy_kms': vel[1],
-                'vz_kms': vel[2]
-            })
-
-        else:
-            raise ValueError(f"지원하지 않는 좌표계: {frame}")
+    # 시간 격자를 한 번에 배열로 만들고, 전체 구간을 한 번의 배열 호출로 전파
+    grid = TimeGrid(start_datetime, duration_minutes, timestep)
+    e, r, v = satellite.sgp4_array(grid.jd, grid.fr)
+    times = grid.datetimes()
+
+    for i in np.flatnonzero(e):
+        print(f"Propagation error at {times[i]} (code {e[i]})")
+    good = np.flatnonzero(e == 0)
+    if not len(good):
+        return []
+
+    r_teme = r[good]
+    v_teme = v[good]
+
+    if frame == "TEME":
+        pos, vel = r_teme, v_teme
+
+    elif frame in ["GCRS", "ITRS"]:
+        # 전체 궤적을 obstime 배열을 가진 하나의 좌표 객체로 한 번에 변환
+        t = grid.time[good]
+        r_cart = CartesianRepresentation(r_teme.T * u.km)
+        v_diff = CartesianDifferential(v_teme.T * u.km / u.s)
+        r_full = r_cart.with_differentials(v_diff)
+
+        # ITRS는 GCRS를 거치지 않고 TEME에서 직접 변환 (결과 동일, 훨씬 빠름)
+        teme_coord = TEME(r_full, obstime=t)
+        if frame == "GCRS":
+            coord = teme_coord.transform_to(GCRS(obstime=t))
+        elif frame == "ITRS":
+            coord = teme_coord.transform_to(ITRS(obstime=t))
+
+        pos = coord.cartesian.xyz.to_value(u.km).T
+        vel = coord.velocity.d_xyz.to_value(u.km/u.s).T
+
+    elif frame == "PEF":
+        # astropy 없이 GMST 회전(+ ω×r 속도 항)만으로 지구 고정 좌표 변환
+        # (UT1=UTC, 극운동 무시: 정확도는 frames.py 참고)
+        pos, vel = teme_to_ecef(r_teme, v_teme, None, theta=grid.gmst[good])
+
+    elif frame == "ITRF":
+        # IERS의 dUT1과 극운동까지 적용한 같은 회전 (astropy ITRS와 mm 수준 일치)
+        jd, fr = grid.jd[good], grid.fr[good]
+        pos, vel = teme_to_ecef(r_teme, v_teme, jd, fr,
+                                *earth_orientation(jd, fr))
+
+    else:
+        raise ValueError(f"지원하지 않는 좌표계: {frame}")
+
+    orbit_data = [
+        {
+            'datetime': times[i],
+            'x_km': x, 'y_km': y, 'z_km': z,
+            'vx_kms': vx, 'vy_kms': vy, 'vz_kms': vz
+        }
+        for i, (x, y, z), (vx, vy, vz) in zip(good, pos.tolist(), vel.tolist())
+    ]
 
     return orbit_data
-
-
-
@@ -0,0 +1,112 @@
+"""Rotate SGP4 output from TEME to Earth-fixed frames with NumPy alone.
+
+Ground tracks, visibility and coverage only need positions in an
+Earth-fixed frame, which the TEME frame of SGP4 reaches by a rotation
+through Greenwich mean sidereal time (PEF) and, optionally, a small
+polar motion correction (ECEF, the ITRF).  The routines here apply
+those rotations to whole arrays of positions and velocities at once,
+following Vallado's ``teme2ecef``, with no astropy objects involved.
+
+Accuracy against astropy's ``TEME`` to ``ITRS`` transform, which uses
+the same IAU-82 sidereal time: given the IERS ``dut1`` and polar motion
+``xp`` and ``yp``, positions agree within a millimetre and velocities
+within 1e-6 km/s, from low-earth orbit out to geostationary distance.
+Without them, UT1 is taken to equal UTC and the pole to sit at its mean
+position.  The rotation is then off by ``7.29e-5 * |dut1|`` radians, so
+with dUT1 below 0.9 seconds the error is at most 0.46 km at 7000 km
+from the geocentre and 2.8 km at geostationary distance, plus up to
+about 20 m from polar motion.  `earth_orientation()` reads the IERS
+values from the tables astropy keeps, without building ``Time``
+objects.
+
+"""
+import numpy as np
+
+from orbit_determination.vectorized import gstime
+
+# Earth's rotation rate in radians per second, as in Vallado's teme2ecef.
+OMEGA_EARTH = 7.29211514670698e-05
+
+
+def teme_to_pef(r, v, theta):
+    """Rotate TEME position and velocity arrays to the PEF frame.
+
+    ``r`` and ``v`` are arrays in km and km/s whose last dimension has
+    length 3, and ``theta`` the Greenwich mean sidereal time in radians
+    of each vector, broadcast against ``r[..., 0]``.  The velocity
+    picks up the ``-omega x r`` term of the rotating frame.
+
+    """
+    r = np.asarray(r, dtype=float)
+    v = np.asarray(v, dtype=float)
+    c = np.cos(theta)
+    s = np.sin(theta)
+
+    x = c * r[..., 0] + s * r[..., 1]
+    y = c * r[..., 1] - s * r[..., 0]
+    vx = c * v[..., 0] + s * v[..., 1] + OMEGA_EARTH * y
+    vy = c * v[..., 1] - s * v[..., 0] - OMEGA_EARTH * x
+
+    z = np.broadcast_to(r[..., 2], x.shape)
+    vz = np.broadcast_to(v[..., 2], x.shape)
+    return np.stack((x, y, z), axis=-1), np.stack((vx, vy, vz), axis=-1)
+
+
+def pef_to_ecef(r, v, xp, yp):
+    """Apply polar motion to PEF arrays, giving ECEF (ITRF) ones.
+
+    ``xp`` and ``yp`` are the polar motion angles in radians, scalars
+    or arrays broadcast like ``theta`` in `teme_to_pef()`.
+
+    """
+    cosxp = np.cos(xp)
+    sinxp = np.sin(xp)
+    cosyp = np.cos(yp)
+    sinyp = np.sin(yp)
+
+    def rotate(a):
+        x, y, z = a[..., 0], a[..., 1], a[..., 2]
+        return np.stack((cosxp * x + sinxp * sinyp * y + sinxp * cosyp * z,
+                         cosyp * y - sinyp * z,
+                         -sinxp * x + cosxp * sinyp * y + cosxp * cosyp * z),
+                        axis=-1)
+
+    return rotate(r), rotate(v)
+
+
+def earth_orientation(jd, fr=0.0):
+    """Return the IERS ``dut1``, ``xp`` and ``yp`` at split UTC dates.
+
+    Interpolates UT1 - UTC in seconds and the polar motion angles in
+    radians at each Julian date ``jd + fr`` from astropy's IERS tables,
+    the same ones its ``ITRS`` frame uses, in the form that
+    `teme_to_ecef()` takes.  No astropy ``Time`` objects are built.
+
+    """
+    from astropy import units as u
+    from astropy.utils import iers
+
+    table = iers.earth_orientation_table.get()
+    xp, yp = table.pm_xy(jd, fr)
+    return (table.ut1_utc(jd, fr).to_value(u.s),
+            xp.to_value(u.rad), yp.to_value(u.rad))
+
+
+def teme_to_ecef(r, v, jd, fr=0.0, dut1=0.0, xp=0.0, yp=0.0, theta=None):
+    """Rotate TEME position and velocity arrays to ECEF (ITRF).
+
+    ``jd`` and ``fr`` are the split UTC Julian dates of the vectors, as
+    passed to ``Satrec.sgp4_array()``, and ``dut1`` is UT1 - UTC in
+    seconds.  ``xp`` and ``yp`` are the polar motion angles in radians;
+    leaving them zero stops at the PEF frame.  A precomputed sidereal
+    time, like ``TimeGrid.gmst``, may be passed as ``theta`` instead of
+    the dates.  See the module docstring for the accuracy.
+
+    """
+    if theta is None:
+        theta = gstime(np.asarray(jd, dtype=float),
+                       np.asarray(fr, dtype=float) + dut1 / 86400.0)
+    r, v = teme_to_pef(r, v, theta)
+    if np.any(xp) or np.any(yp):
+        r, v = pef_to_ecef(r, v, xp, yp)
+    return r, v
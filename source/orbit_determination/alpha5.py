@@ -1,5 +1,8 @@
 """Alpha 5 encoding of satellite numbers to fit in 5 characters."""
 
+# The first character of an Alpha 5 number for each multiple of 10000.
+FIRST = b'0123456789ABCDEFGHJKLMNPQRSTUVWXYZ'
+
 def to_alpha5(n):
     if n < 100000:
         return '%05d' % n
@@ -20,3 +23,75 @@ def from_alpha5(s):
     n -= c > 'I'
     n -= c > 'O'
     return n * 10000 + int(s)
+
+def to_alpha5_array(n):
+    """Encode an array of satellite numbers as Alpha 5 strings.
+
+    Returns a ``U5`` array shaped like ``n``.  Raises ``ValueError`` if
+    any number is negative or exceeds 339999.
+
+    """
+    import numpy as np
+
+    n = np.asarray(n)
+    shape = n.shape
+    if n.size and (n.min() < 0 or n.max() > 339999):
+        raise ValueError('satellite number cannot exceed 339999,'
+                         " whose Alpha 5 encoding is 'Z9999'")
+    n = n.astype(np.int64).ravel()
+    chars = np.empty((len(n), 5), np.uint8)
+    chars[:, 0] = np.frombuffer(FIRST, np.uint8)[n // 10000]
+    for k, power in enumerate((1000, 100, 10, 1), 1):
+        chars[:, k] = n // power % 10 + ord('0')
+    return chars.view('S5').astype('U5').reshape(shape)
+
+def from_alpha5_array(strings, errors='raise'):
+    """Decode an array of Alpha 5 strings or bytes to satellite numbers.
+
+    Accepts what `from_alpha5()` does, including numbers padded with
+    spaces, for a whole array at once.  A malformed entry raises
+    ``ValueError``, or with ``errors='coerce'`` decodes to -1.
+
+    """
+    import numpy as np
+
+    if errors not in ('raise', 'coerce'):
+        raise ValueError("errors must be 'raise' or 'coerce'")
+    strings = np.asarray(strings)
+    shape = strings.shape
+    if strings.dtype.kind not in 'SU':
+        strings = strings.astype('U')
+    strings = np.ascontiguousarray(strings.ravel())
+    width = strings.dtype.itemsize // (4 if strings.dtype.kind == 'U' else 1)
+    code = np.uint32 if strings.dtype.kind == 'U' else np.uint8
+    chars = strings.view(code).reshape(len(strings), width).astype(np.int64)
+    if width < 5:
+        chars = np.pad(chars, ((0, 0), (5 - width, 0)))
+
+    # Fields padded with spaces, or shorter or longer than 5, are read
+    # the way int() reads them: right-justified and zero-filled.
+    bad = np.zeros(len(chars), bool)
+    blank = (chars == 0) | (chars == ord(' '))
+    if chars.shape[1] != 5 or blank.any():
+        used = ~blank
+        start = used.argmax(axis=1)
+        stop = chars.shape[1] - used[:, ::-1].argmax(axis=1)
+        bad = ~used.any(axis=1) | (stop - start > 5)
+        bad |= used.sum(axis=1) != stop - start
+        columns = stop[:, None] - 5 + np.arange(5)
+        chars = np.take_along_axis(chars, np.maximum(columns, 0), axis=1)
+        chars[columns < start[:, None]] = ord('0')
+
+    first = np.full(256, -1, np.int64)
+    first[np.frombuffer(FIRST, np.uint8)] = range(len(FIRST))
+    lead = first[np.minimum(chars[:, 0], 255)]
+    digits = chars[:, 1:] - ord('0')
+    bad |= (lead < 0) | ((digits < 0) | (digits > 9)).any(axis=1)
+    n = lead * 10000 + digits @ np.array([1000, 100, 10, 1])
+
+    if bad.any():
+        if errors == 'raise':
+            raise ValueError('invalid Alpha 5 satellite number: %r'
+                             % str(strings[bad][0]))
+        n[bad] = -1
+    return n.reshape(shape)
@@ -0,0 +1,762 @@
+"""Read whole TLE catalogs at once into NumPy arrays.
+
+``io.twoline2rv()`` parses and initializes one satellite per call.  The
+routines here instead read an entire catalog as bytes, check the fixed
+column layout of every record at once, and decode each numeric field
+across all records with a single array conversion.  The result is a
+structured array of elements in the units ``sgp4init()`` expects;
+initializing the satellites is a separate step, `initialize()`.
+
+Parsed records and their initialized coefficients can be saved to a
+binary cache with `save_cache()` and mapped back with `open_cache()`,
+so that later processes skip both steps.
+
+"""
+import hashlib
+import json
+import os
+import numpy as np
+from math import pi, pow
+from numpy.lib.recfunctions import repack_fields
+
+from orbit_determination.alpha5 import from_alpha5_array
+from orbit_determination.ext import jday
+from orbit_determination.functions import days2mdhms_array
+from orbit_determination.io import LINE1, LINE2, error_message
+from orbit_determination.model import WGS72
+
+deg2rad = pi / 180.0
+xpdotp = 1440.0 / (2.0 * pi)
+
+# Width to which every line is padded before decoding.
+WIDTH = 69
+
+# The columns of each line that twoline2rv() checks, with the character
+# each must hold, and the minimum length of each line.
+LINE1_COLUMNS = ((0, b'1'), (1, b' '), (8, b' '), (23, b'.'), (32, b' '),
+                 (34, b'.'), (43, b' '), (52, b' '), (61, b' '), (63, b' '))
+LINE2_COLUMNS = ((0, b'2'), (1, b' '), (7, b' '), (11, b'.'), (16, b' '),
+                 (20, b'.'), (25, b' '), (33, b' '), (37, b'.'), (42, b' '),
+                 (46, b'.'), (51, b' '))
+LINE1_LENGTH = 64
+LINE2_LENGTH = 68
+
+# Powers of ten taken from math.pow() so that they match twoline2rv()
+# exactly: _powers_of_ten[k + POWERS_OFFSET] is 10**k for every k from
+# -330, below the smallest double, to 308.  This covers the exponent
+# fields of nddot and bstar, -9 through 99, and the values omm.py
+# rebuilds them from.
+POWERS_OFFSET = 330
+_powers_of_ten = np.array([pow(10.0, k)
+                           for k in range(-POWERS_OFFSET, 309)])
+
+# What each byte adds to a TLE checksum: digits their value, '-' one.
+_checksum_values = np.zeros(256, np.uint8)
+_checksum_values[ord('0'):ord('9') + 1] = range(10)
+_checksum_values[ord('-')] = 1
+
+RECORD_DTYPE = np.dtype([
+    ('satnum', 'i8'),
+    ('classification', 'S1'),
+    ('intldesg', 'S8'),
+    ('epochyr', 'i4'),
+    ('epochdays', 'f8'),
+    ('epoch', 'f8'),
+    ('jdsatepoch', 'f8'),
+    ('jdsatepochF', 'f8'),
+    ('ndot', 'f8'),
+    ('nddot', 'f8'),
+    ('bstar', 'f8'),
+    ('ephtype', 'i4'),
+    ('elnum', 'i4'),
+    ('inclo', 'f8'),
+    ('nodeo', 'f8'),
+    ('ecco', 'f8'),
+    ('argpo', 'f8'),
+    ('mo', 'f8'),
+    ('no_kozai', 'f8'),
+    ('revnum', 'i4'),
+])
+
+# Records read with names=True also carry the title line of 3-line sets.
+NAMED_RECORD_DTYPE = np.dtype(RECORD_DTYPE.descr + [('name', 'U24')])
+
+# Error codes reported by parse_tle_checked() and iter_tle_checked().
+TLE_OK = 0
+TLE_UNPAIRED = 1    # a line 1 without its line 2, or the reverse
+TLE_SHORT = 2       # a line shorter than its template
+TLE_NON_ASCII = 3   # a line holding a byte outside ASCII
+TLE_LAYOUT = 4      # a column without the space, period or digit required
+TLE_SATNUM = 5      # lines 1 and 2 give different object numbers
+TLE_FIELD = 6       # a numeric field that does not convert
+
+# One entry of an error report: the record's index in the file, or -1
+# for an unpaired line, the file line number, and the 1-based column.
+ERROR_DTYPE = np.dtype([
+    ('record', 'i8'),
+    ('line', 'i8'),
+    ('column', 'i4'),
+    ('code', 'i2'),
+])
+
+# Binary cache layout: the magic bytes and a JSON header padded to
+# CACHE_HEADER_SIZE, then the records, then the coefficient columns,
+# each section starting on a CACHE_ALIGN boundary.
+CACHE_MAGIC = b'ODCATLG\0'
+CACHE_VERSION = 1
+CACHE_HEADER_SIZE = 4096
+CACHE_ALIGN = 64
+
+
+def load_tle(path):
+    """Read a TLE file and return its records; see `parse_tle()`."""
+    with open(path, 'rb') as f:
+        return parse_tle(f.read())
+
+
+def load_tle_checked(path, names=False):
+    """Read a TLE file without raising; see `parse_tle_checked()`."""
+    with open(path, 'rb') as f:
+        return parse_tle_checked(f.read(), names)
+
+
+def parse_tle(data):
+    """Parse the bytes of a TLE catalog into a structured array.
+
+    ``data`` holds two-line element sets, optionally preceded by title
+    lines, which are skipped.  Returns an array of ``RECORD_DTYPE`` with
+    one record per element set, whose fields carry the same values and
+    units that ``io.twoline2rv()`` stores on a satellite: angles in
+    radians, mean motion in radians per minute, and ``epoch`` in days
+    since 1949 December 31 00:00 UT, ready for ``sgp4init()``.
+
+    Raises ``ValueError`` describing the first record whose lines do not
+    follow the ``LINE1`` and ``LINE2`` templates, or holding a field that
+    ``io.twoline2rv()`` would fail to convert, such as one with a NUL
+    byte.  Like it, any exponent from -9 to 99 is accepted.
+
+    """
+    batches = list(iter_tle(data.splitlines(), batch_size=None))
+    if not batches:
+        return np.empty(0, RECORD_DTYPE)
+    return batches[0]
+
+
+def parse_tle_checked(data, names=False):
+    """Parse TLE bytes, reporting malformed records instead of raising.
+
+    Returns ``(records, codes, report)`` for the whole of ``data``; see
+    `iter_tle_checked()`.
+
+    """
+    batches = list(iter_tle_checked(data.splitlines(), None, names))
+    if not batches:
+        dtype = NAMED_RECORD_DTYPE if names else RECORD_DTYPE
+        return (np.empty(0, dtype), np.empty(0, np.int16),
+                np.empty(0, ERROR_DTYPE))
+    return batches[0]
+
+
+def iter_tle(file, batch_size=10000, names=False, errors='raise',
+             skipped=None):
+    """Read a TLE file object in batches of at most ``batch_size`` records.
+
+    The file may be opened in binary or text mode, or be any iterable
+    of lines, and may mix 2-line element sets with 3-line ones whose
+    first line is a title.  Only one batch of lines is held at a time,
+    so memory stays bounded however large the file; a ``batch_size``
+    of None reads everything as one batch.  Each batch is a structured
+    array like the one `parse_tle()` returns; with ``names=True`` its
+    dtype is ``NAMED_RECORD_DTYPE``, whose extra ``name`` field holds
+    the title line, or an empty string for 2-line element sets.
+
+    A malformed record raises ``ValueError`` unless ``errors='skip'``,
+    in which case it is left out of its batch and, if ``skipped`` is a
+    list, the ``(line_number, line)`` of the line at fault is appended
+    to it.
+
+    """
+    if errors not in ('raise', 'skip'):
+        raise ValueError("errors must be 'raise' or 'skip'")
+    dtype = NAMED_RECORD_DTYPE if names else RECORD_DTYPE
+    if skipped is None:
+        skipped = []
+    count = 0
+
+    for batch in _batches(file, batch_size):
+        numbers1, numbers2, lines1, lines2, titles, unpaired = batch
+        for number, line, which in unpaired:
+            if errors == 'raise':
+                _raise_problem(TLE_UNPAIRED, which, line)
+            skipped.append((number, _text(line)))
+        if not lines1:
+            continue
+
+        records, code, column, which = _decode(
+            lines1, lines2, dtype, titles if names else None)
+        bad = np.flatnonzero(code)
+        if errors == 'raise' and len(bad):
+            i = bad[0]
+            line = lines1[i] if which[i] == 1 else lines2[i]
+            _raise_problem(code[i], which[i], line, count + i)
+        count += len(records)
+        if not len(bad):
+            yield records
+            continue
+        for i in bad:
+            if which[i] == 1:
+                skipped.append((numbers1[i], _text(lines1[i])))
+            else:
+                skipped.append((numbers2[i], _text(lines2[i])))
+        yield records[code == TLE_OK]
+
+
+def iter_tle_checked(file, batch_size=10000, names=False):
+    """Read a TLE file object in batches, reporting instead of raising.
+
+    Like `iter_tle()`, but nothing is raised and nothing is dropped.
+    Each batch is a tuple ``(records, codes, report)``: every element
+    set read, an ``int16`` array giving each one's error code, which
+    is ``TLE_OK`` for a good record, and an ``ERROR_DTYPE`` array with
+    one entry per problem found, including lines that have no partner.
+    The fields of records whose code is not ``TLE_OK`` are meaningless,
+    so keep ``records[codes == TLE_OK]``.  Report entries number records
+    from zero across the whole file, and lines and columns from one.
+
+    """
+    dtype = NAMED_RECORD_DTYPE if names else RECORD_DTYPE
+    count = 0
+
+    for batch in _batches(file, batch_size):
+        numbers1, numbers2, lines1, lines2, titles, unpaired = batch
+        if lines1:
+            records, code, column, which = _decode(
+                lines1, lines2, dtype, titles if names else None)
+        else:
+            records, code = np.empty(0, dtype), np.empty(0, np.int16)
+
+        bad = np.flatnonzero(code)
+        report = np.empty(len(unpaired) + len(bad), ERROR_DTYPE)
+        entries = [(-1, number, 1, TLE_UNPAIRED)
+                   for number, line, line_which in unpaired]
+        for i in bad:
+            number = numbers1[i] if which[i] == 1 else numbers2[i]
+            entries.append((count + i, number, column[i], code[i]))
+        report[:] = entries
+        report.sort(order='line')
+
+        count += len(records)
+        yield records, code, report
+
+
+def iter_records(file, **keywords):
+    """Read a TLE file object one record at a time; see `iter_tle()`."""
+    for batch in iter_tle(file, **keywords):
+        for record in batch:
+            yield record
+
+
+def _batches(file, batch_size):
+    # Pairs up the lines of a file, yielding the line numbers, lines and
+    # titles of each batch of element sets, plus the (number, line,
+    # which) of every line met since the last batch that had no partner.
+    numbers1, numbers2, lines1, lines2, titles, unpaired = [], [], [], [], [], []
+    pending = None
+    title = b''
+
+    for number, line in enumerate(file, 1):
+        if isinstance(line, str):
+            line = line.encode('utf-8')
+        line = line.rstrip()
+        if not line:
+            continue
+        kind = line[:2]
+        if kind == b'2 ' and pending is not None:
+            numbers1.append(pending[0])
+            numbers2.append(number)
+            lines1.append(pending[1])
+            lines2.append(line)
+            titles.append(pending[2])
+            pending = None
+            if len(lines1) == batch_size:
+                yield numbers1, numbers2, lines1, lines2, titles, unpaired
+                numbers1, numbers2, lines1, lines2, titles, unpaired = (
+                    [], [], [], [], [], [])
+            continue
+        if pending is not None:
+            unpaired.append((pending[0], pending[1], 1))
+            pending = None
+        if kind == b'1 ':
+            pending = number, line, title
+            title = b''
+        elif kind == b'2 ':
+            unpaired.append((number, line, 2))
+        else:
+            title = line[2:] if line[:2] == b'0 ' else line
+
+    if pending is not None:
+        unpaired.append((pending[0], pending[1], 1))
+    if lines1 or unpaired:
+        yield numbers1, numbers2, lines1, lines2, titles, unpaired
+
+
+def _decode(lines1, lines2, dtype, titles=None):
+    # Decodes matching lists of line 1 and line 2 into records, without
+    # raising.  Also returns, for each record, its error code, the
+    # 1-based column of the problem and which of its lines holds it.
+    line1 = _pad(lines1)
+    line2 = _pad(lines2)
+    code, column = _problems(lines1, line1, LINE1_COLUMNS, LINE1_LENGTH)
+    code2, column2 = _problems(lines2, line2, LINE2_COLUMNS, LINE2_LENGTH)
+    second = (code == TLE_OK) & (code2 != TLE_OK)
+    code[second] = code2[second]
+    column[second] = column2[second]
+    which = np.where(second, 2, 1)
+
+    mismatch = (code == TLE_OK) & np.any(line1[:, 2:7] != line2[:, 2:7],
+                                         axis=1)
+    code[mismatch] = TLE_SATNUM
+    column[mismatch] = 3
+    which[mismatch] = 2
+
+    failed = np.zeros((len(line1), 2), int)
+    records = _fields(line1, line2, titles, dtype, failed)
+    field = (code == TLE_OK) & (failed[:, 0] > 0)
+    code[field] = TLE_FIELD
+    column[field] = failed[field, 0]
+    which[field] = failed[field, 1]
+    return records, code, column, which
+
+
+def _fields(line1, line2, titles, dtype, failed):
+    # Converts every field; a value that will not convert is left zero
+    # and its record's first failing (column, line) noted in failed.
+    def number(line, start, stop, dtype, which):
+        return _convert(_field(line, start, stop), dtype, failed,
+                        start + 1, which)
+
+    records = np.empty(len(line1), dtype)
+    if titles is not None:
+        records['name'] = [_text(title) for title in titles]
+    records['satnum'] = _satnums(_field(line1, 2, 7), failed)
+    classification = _field(line1, 7, 8)
+    records['classification'] = np.where(classification == b' ', b'U',
+                                         classification)
+    records['intldesg'] = np.char.rstrip(_field(line1, 9, 17))
+    two_digit_year = number(line1, 18, 20, int, 1)
+    epochdays = number(line1, 20, 32, float, 1)
+    ndot = number(line1, 33, 43, float, 1)
+    nddot = _convert(_field(_splice(line1, 44, 45, 50), 0, 7), float,
+                     failed, 45, 1)
+    nexp = number(line1, 50, 52, int, 1)
+    bstar = _convert(_field(_splice(line1, 53, 54, 59), 0, 7), float,
+                     failed, 54, 1)
+    ibexp = number(line1, 59, 61, int, 1)
+    ephtype = _field(line1, 62, 63)
+    records['ephtype'] = _convert(np.where(ephtype == b' ', b'0', ephtype),
+                                  int, failed, 63, 1)
+    records['elnum'] = number(line1, 64, 68, int, 1)
+
+    inclo = number(line2, 8, 16, float, 2)
+    nodeo = number(line2, 17, 25, float, 2)
+    ecco = line2[:, 24:33].copy()
+    ecco[:, 0:2] = b'0.'[0], b'0.'[1]
+    ecco[:, 2:] = np.where(ecco[:, 2:] == ord(' '), ord('0'), ecco[:, 2:])
+    ecco = _convert(_field(ecco, 0, 9), float, failed, 27, 2)
+    argpo = number(line2, 34, 42, float, 2)
+    mo = number(line2, 43, 51, float, 2)
+    no_kozai = number(line2, 52, 63, float, 2)
+    records['revnum'] = number(line2, 63, 68, int, 2)
+
+    #  ---- find no, ndot, nddot ----
+    records['no_kozai'] = no_kozai / xpdotp
+    nddot = nddot * _powers_of_ten[nexp + POWERS_OFFSET]
+    records['bstar'] = bstar * _powers_of_ten[ibexp + POWERS_OFFSET]
+
+    #  ---- convert to sgp4 units ----
+    records['ndot'] = ndot / (xpdotp*1440.0)
+    records['nddot'] = nddot / (xpdotp*1440.0*1440)
+
+    #  ---- find standard orbital elements ----
+    records['inclo'] = inclo * deg2rad
+    records['nodeo'] = nodeo * deg2rad
+    records['ecco'] = ecco
+    records['argpo'] = argpo * deg2rad
+    records['mo'] = mo * deg2rad
+
+    # ---------------- temp fix for years from 1957-2056 -------------------
+    year = np.where(two_digit_year < 57, two_digit_year + 2000,
+                    two_digit_year + 1900)
+    fill_epoch(records, year, epochdays)
+    return records
+
+
+def fill_epoch(records, year, epochdays):
+    """Set the epoch fields of records from a year and day of the year.
+
+    ``year`` has four digits and ``epochdays`` counts from 1.0 at the
+    start of January 1, as in a TLE.  Fills ``epochyr``, ``epochdays``,
+    ``epoch`` and the split ``jdsatepoch`` and ``jdsatepochF`` exactly
+    as ``Satrec.twoline2rv()`` would compute them.
+
+    """
+    year = np.asarray(year)
+    records['epochyr'] = year % 100
+    records['epochdays'] = epochdays
+    records['epoch'] = _sgp4_epoch(year, epochdays) - 2433281.5
+
+    # The split Julian date that Satrec.twoline2rv() stores.
+    days, fraction = np.divmod(epochdays, 1.0)
+    records['jdsatepoch'] = (year * 365 + (year - 1) // 4 + days +
+                             1721044.5)
+    records['jdsatepochF'] = [round(f, 8) for f in fraction.tolist()]
+
+
+def initialize(records, whichconst=WGS72, opsmode='i'):
+    """Initialize the satellites in a structured array of records.
+
+    Runs ``vectorized.sgp4init_array()`` over the elements decoded by
+    `parse_tle()` and returns its ``Columns``, with the same coefficients
+    ``Satrec.twoline2rv()`` would give each satellite.
+
+    """
+    from orbit_determination.vectorized import sgp4init_array
+
+    columns = sgp4init_array(
+        whichconst, opsmode, records['epoch'], records['bstar'],
+        records['ndot'], records['nddot'], records['ecco'],
+        records['argpo'], records['inclo'], records['mo'],
+        records['no_kozai'], records['nodeo'])
+    columns.data[columns.fields.index('jdsatepoch')] = records['jdsatepoch']
+    columns.data[columns.fields.index('jdsatepochF')] = records['jdsatepochF']
+    return columns
+
+
+def source_hash(path):
+    """Return the SHA-256 hex digest of the file at ``path``."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def save_cache(path, records, columns, source=''):
+    """Write records and their initialized coefficients to a cache file.
+
+    ``records`` is an array of ``RECORD_DTYPE``, or of
+    ``NAMED_RECORD_DTYPE``, whose names are not stored, and ``columns``
+    the ``Columns`` that `initialize()` returned for them.  ``source`` is a
+    string identifying what the cache was built from, typically from
+    `source_hash()`, which `open_cache()` can later check.  The file is
+    written under a temporary name and then renamed into place, so
+    readers never see a partial cache.
+
+    """
+    from orbit_determination.vectorized import COEFFICIENT_FIELDS
+
+    if tuple(columns.fields) != COEFFICIENT_FIELDS:
+        raise ValueError('columns must use the COEFFICIENT_FIELDS layout')
+    records = np.asarray(records)
+    if records.dtype != RECORD_DTYPE:
+        records = repack_fields(records[list(RECORD_DTYPE.names)])
+    records = np.ascontiguousarray(records, RECORD_DTYPE)
+    coefficients = np.ascontiguousarray(columns.data, float)
+    count = len(records)
+
+    records_offset = CACHE_HEADER_SIZE
+    coefficients_offset = _align(records_offset + records.nbytes)
+    header = dict(_cache_layout(), count=count, source=source,
+                  records_offset=records_offset,
+                  coefficients_offset=coefficients_offset)
+    header = CACHE_MAGIC + json.dumps(header).encode('ascii')
+    if len(header) > CACHE_HEADER_SIZE:
+        raise ValueError('cache header is too large')
+
+    temporary = '%s.%d.tmp' % (path, os.getpid())
+    with open(temporary, 'wb') as f:
+        f.write(header.ljust(CACHE_HEADER_SIZE, b'\0'))
+        f.write(records.tobytes())
+        f.write(b'\0' * (coefficients_offset - f.tell()))
+        f.write(coefficients.tobytes())
+    os.replace(temporary, path)
+
+
+def open_cache(path, source=None):
+    """Map a cache file written by `save_cache()` read-only.
+
+    Returns the records and a ``Columns`` of coefficients, both backed
+    by ``numpy.memmap`` views of the file, so that opening is nearly
+    instant and processes that map the same file share its pages.
+    Raises ``ValueError`` if the file is not a cache of the current
+    version and layout, or if ``source`` is given and differs from the
+    one the cache was written with.
+
+    """
+    from orbit_determination.vectorized import COEFFICIENT_FIELDS, Columns
+
+    header = _read_cache_header(path)
+    if source is not None and header['source'] != source:
+        raise ValueError('cache {0!r} was built from a different source'
+                         .format(path))
+
+    count = header['count']
+    shape = len(COEFFICIENT_FIELDS), count
+    if count:
+        records = np.memmap(path, RECORD_DTYPE, 'r',
+                            header['records_offset'], (count,))
+        data = np.memmap(path, float, 'r',
+                         header['coefficients_offset'], shape)
+    else:
+        records = np.empty(0, RECORD_DTYPE)
+        data = np.empty(shape)
+    return records, Columns(data, COEFFICIENT_FIELDS)
+
+
+def load_catalog(path, cache_path, whichconst=WGS72, opsmode='i',
+                 workers=None):
+    """Return the records and coefficients of a TLE file, via a cache.
+
+    If ``cache_path`` holds a cache built from the current contents of
+    the TLE file at ``path`` with the same gravity model and opsmode, it
+    is mapped with `open_cache()`; otherwise the file is parsed and
+    initialized, and the cache is rewritten.  Given a number of
+    ``workers``, a rebuild parses and initializes the file in that many
+    processes with ``parallel.ingest_tle()``.
+
+    """
+    source = '%s:%s:%s' % (source_hash(path), whichconst, opsmode)
+    try:
+        return open_cache(cache_path, source)
+    except (OSError, ValueError):
+        pass
+    if workers is None:
+        records = load_tle(path)
+        columns = initialize(records, whichconst, opsmode)
+    else:
+        from orbit_determination.parallel import ingest_tle
+        records, columns = ingest_tle(path, workers, initialize=True,
+                                      whichconst=whichconst, opsmode=opsmode)
+    save_cache(cache_path, records, columns, source)
+    return open_cache(cache_path, source)
+
+
+def split_tle(path, parts):
+    """Split a TLE file into at most ``parts`` byte ranges of records.
+
+    Returns a list of ``(start, stop)`` byte offsets of roughly equal
+    size that cover the whole file.  Each range ends just after a line
+    2, so no element set, nor the title line of a 3-line set, is cut
+    in two; reading each range with `iter_tle()` and joining the
+    batches in order gives the same records as reading the whole file.
+
+    """
+    size = os.path.getsize(path)
+    bounds = [0]
+    with open(path, 'rb') as f:
+        for k in range(1, parts):
+            offset = max(size * k // parts, bounds[-1])
+            if offset >= size:
+                break
+            f.seek(offset)
+            f.readline()
+            for line in iter(f.readline, b''):
+                if line[:2] == b'2 ':
+                    break
+            if f.tell() > bounds[-1]:
+                bounds.append(f.tell())
+    if bounds[-1] < size:
+        bounds.append(size)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def compute_checksums(data, width=None):
+    """Compute the TLE checksum digit of many fixed-width lines at once.
+
+    ``data`` is either a 2-D ``uint8`` array with one line per row, or
+    a bytes buffer of lines that all share the same ``width``, counting
+    any line ending, though the last line may lack its ending; if
+    ``width`` is omitted it is taken from the first newline.  Returns
+    the digits as an integer array, tallied like
+    ``io.compute_checksum()`` over the first 68 columns of each line.
+
+    """
+    lines = _line_matrix(data, width)
+    tally = _checksum_values[lines[:, :68]].sum(axis=1, dtype=np.int32)
+    return tally % 10
+
+
+def verify_checksums(data, width=None):
+    """Verify the checksums of many fixed-width lines at once.
+
+    Returns a boolean mask that is true for each line whose checksum
+    column holds a digit other than its computed checksum, together
+    with the computed digits.  As with ``io.verify_checksum()``, a line
+    without a digit in its checksum column is not a failure.
+
+    """
+    lines = _line_matrix(data, width)
+    computed = compute_checksums(lines)
+    given = lines[:, 68].astype(int) - ord('0')
+    failed = (given >= 0) & (given <= 9) & (given != computed)
+    return failed, computed
+
+
+def fix_checksums(data, width=None):
+    """Return a copy of ``data`` with every checksum column rewritten.
+
+    Like ``io.fix_checksum()`` for each line, except that the lines keep
+    their width: column 69 of every line is set to its computed digit.
+    The copy has the same type as ``data``, bytes or array.
+
+    """
+    lines = _line_matrix(data, width).copy()
+    lines[:, 68] = compute_checksums(lines) + ord('0')
+    if isinstance(data, np.ndarray):
+        return lines
+    return lines.tobytes()[:len(data)]
+
+
+def _cache_layout():
+    from orbit_determination.vectorized import COEFFICIENT_FIELDS
+
+    # Round-tripped through JSON so it compares equal to a parsed header.
+    return json.loads(json.dumps(dict(
+        version=CACHE_VERSION,
+        records=RECORD_DTYPE.descr,
+        fields=COEFFICIENT_FIELDS,
+    )))
+
+
+def _read_cache_header(path):
+    with open(path, 'rb') as f:
+        header = f.read(CACHE_HEADER_SIZE)
+    if not header.startswith(CACHE_MAGIC):
+        raise ValueError('{0!r} is not a catalog cache'.format(path))
+    header = json.loads(header[len(CACHE_MAGIC):].rstrip(b'\0'))
+    for key, value in _cache_layout().items():
+        if header.get(key) != value:
+            raise ValueError('catalog cache {0!r} has an outdated {1}'
+                             .format(path, key))
+    return header
+
+
+def _align(offset):
+    return -(-offset // CACHE_ALIGN) * CACHE_ALIGN
+
+
+def _line_matrix(data, width):
+    if isinstance(data, np.ndarray):
+        lines = data
+    else:
+        if width is None:
+            width = data.find(b'\n') + 1 or max(len(data), WIDTH)
+        # A buffer need not end with a newline; the last line then
+        # borrows the ending of the first to reach the full width.
+        missing = -len(data) % width
+        if missing and missing > width - 69:
+            raise ValueError('buffer length {0} is not a multiple of the'
+                             ' line width {1}'.format(len(data), width))
+        if missing:
+            data = bytes(data) + bytes(data[width - missing:width])
+        lines = np.frombuffer(data, np.uint8).reshape(-1, width)
+    if lines.shape[1] < 69:
+        raise ValueError('lines must be at least 69 columns wide to hold'
+                         ' a checksum')
+    return lines
+
+
+def _pad(lines):
+    data = b''.join(line[:WIDTH].ljust(WIDTH) for line in lines)
+    return np.frombuffer(data, np.uint8).reshape(len(lines), WIDTH)
+
+
+def _field(array, start, stop):
+    width = stop - start
+    field = np.ascontiguousarray(array[:, start:stop])
+    return field.view('S%d' % width)[:, 0]
+
+
+def _splice(array, sign, start, stop):
+    # Builds "<sign>.<digits>" from an implied-decimal-point field.
+    result = np.empty((len(array), stop - start + 2), np.uint8)
+    result[:, 0] = array[:, sign]
+    result[:, 1] = ord('.')
+    result[:, 2:] = array[:, start:stop]
+    return result
+
+
+def _satnums(strings, failed):
+    satnums = from_alpha5_array(strings, errors='coerce')
+    for i in np.flatnonzero((satnums < 0) | _nul(strings)):
+        if not failed[i, 0]:
+            failed[i] = 3, 1
+    return satnums
+
+
+def _convert(strings, dtype, failed, column, which):
+    bad = _nul(strings)
+    try:
+        values = strings.astype(dtype)
+    except ValueError:
+        values = np.zeros(len(strings), dtype)
+        for i, s in enumerate(strings):
+            try:
+                values[i] = s.astype(dtype)
+            except ValueError:
+                bad[i] = True
+    for i in np.flatnonzero(bad):
+        values[i] = 0
+        if not failed[i, 0]:
+            failed[i] = column, which
+    return values
+
+
+def _nul(strings):
+    # NumPy drops the trailing NUL bytes of a bytes field, which int()
+    # and float() in twoline2rv() reject; finds the fields holding any.
+    raw = strings.view(np.uint8).reshape(len(strings), strings.itemsize)
+    return (raw == 0).any(axis=1)
+
+
+def _sgp4_epoch(year, days):
+    # Array form of jday(year, *days2mdhms(year, days)) as io.py uses it.
+    return jday(year, *days2mdhms_array(year, days))
+
+
+def _problems(lines, array, columns, length):
+    # Returns the error code and 1-based column of each line's first
+    # problem with its template, or zeros for lines that fit it.
+    code = np.zeros(len(lines), np.int16)
+    column = np.zeros(len(lines), np.int32)
+
+    positions = np.array([c for c, char in columns])
+    chars = np.frombuffer(b''.join(char for c, char in columns), np.uint8)
+    wrong = array[:, positions] != chars
+    layout = wrong.any(axis=1)
+    code[layout] = TLE_LAYOUT
+    column[layout] = positions[wrong[layout].argmax(axis=1)] + 1
+
+    high = array > 127
+    non_ascii = high.any(axis=1)
+    code[non_ascii] = TLE_NON_ASCII
+    column[non_ascii] = high[non_ascii].argmax(axis=1) + 1
+
+    lengths = np.array([len(line) for line in lines], dtype=np.int32)
+    short = lengths < length
+    code[short] = TLE_SHORT
+    column[short] = lengths[short] + 1
+    return code, column
+
+
+def _raise_problem(code, which, line, record=None):
+    if code == TLE_SATNUM:
+        raise ValueError('Object numbers in lines 1 and 2 do not match'
+                         ' in record {0}'.format(record))
+    raise ValueError(error_message.format(
+        which, LINE1 if which == 1 else LINE2, _text(line)))
+
+
+def _text(line):
+    return line.decode('utf-8', 'replace').strip()
+
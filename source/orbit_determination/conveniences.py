@@ -36,6 +36,45 @@ def jday_datetime(dt):
 
     return jd, fr
 
+def jday_datetime64(t):
+    """배열 버전 jday_datetime: datetime64 배열을 (jd, fr) 배열로 변환
+
+    각 원소는 같은 시각의 datetime에 jday_datetime을 적용한 값과 같음.
+    마이크로초보다 세밀한 단위(ns 등)는 그 정밀도를 그대로 유지.
+    """
+    import numpy as np
+
+    t = np.asarray(t)
+    if t.dtype.kind != 'M':
+        t = t.astype('datetime64[us]')
+    unit, count = np.datetime_data(t.dtype)
+    if unit in ('Y', 'M', 'W', 'D', 'h', 'm', 's', 'ms', 'generic'):
+        t = t.astype('datetime64[us]')
+        unit, count = 'us', 1
+
+    months = t.astype('datetime64[M]')
+    days = t.astype('datetime64[D]')
+    year = months.astype(np.int64) // 12 + 1970
+    month = months.astype(np.int64) % 12 + 1
+    day = (days - months).astype(np.int64) + 1
+
+    ticks = (t - days).astype(np.int64)
+    per_second = np.timedelta64(1, 's') // np.timedelta64(count, unit)
+    seconds, fraction = np.divmod(ticks, per_second)
+    minutes, second = np.divmod(seconds, 60)
+    hour, minute = np.divmod(minutes, 60)
+    second = second + fraction / float(per_second)
+
+    jd = (367.0 * year
+        - ((7 * (year + ((month + 9) / 12.0).astype(np.int64))) * 0.25
+           ).astype(np.int64)
+        + (275 * month / 9.0).astype(np.int64)
+        + day + 1721013.5)
+
+    fr = (second + minute * 60.0 + hour * 3600.0) / 86400.0
+
+    return jd, fr
+
 def sat_epoch_datetime(sat):
     """주어진 위성의 epoch를 Python에에 날짜/시간으로 반환"""
     year = sat.epochyr
@@ -3,7 +3,7 @@
 
 from math import (acos, asinh, atan2, copysign, cos, fabs, fmod,
                   pi, sin, sinh, sqrt, tan)
-from .functions import days2mdhms
+from .functions import days2mdhms, days2mdhms_array
 
 undefined = None
 
@@ -544,3 +544,31 @@ def invjday(jd):
      mon, day, hr, minute, sec = days2mdhms(year, days, None);
      sec = sec - 0.00000086400;
      return year, mon, day, hr, minute, sec
+
+"""
+Array version of invjday: jd may be a numpy array, and each output is an
+array whose elements match what invjday returns for that julian date.
+"""
+
+def invjday_array(jd):
+     import numpy as np
+
+     #  --------------- find year and days of the year ---------------
+     temp    = np.asarray(jd, dtype=float) - 2415019.5;
+     tu      = temp / 365.25;
+     year    = 1900 + (tu // 1.0).astype(np.int64);
+     leapyrs = (((year - 1901) * 0.25) // 1.0).astype(np.int64);
+
+     #  optional nudge by 8.64x10-7 sec to get even outputs
+     days    = temp - ((year - 1900) * 365.0 + leapyrs) + 0.00000000001;
+
+     #  ------------ check for case of beginning of a year -----------
+     early   = days < 1.0;
+     year    = np.where(early, year - 1, year);
+     leapyrs = (((year - 1901) * 0.25) // 1.0).astype(np.int64);
+     days    = np.where(early, temp - ((year - 1900) * 365.0 + leapyrs), days);
+
+     #  ----------------- find remaing data  -------------------------
+     mon, day, hr, minute, sec = days2mdhms_array(year, days, None);
+     sec = sec - 0.00000086400;
+     return year, mon, day, hr, minute, sec
@@ -77,6 +77,77 @@ def days2mdhms(year, days, round_to_microsecond=6):
 
     return month, day, int(hour), int(minute), second
 
+def jday_array(year, mon, day, hr, minute, sec):
+    """Array version of `jday()`, returning ``(jd, fr)`` float64 arrays.
+
+    The arguments may be NumPy arrays or scalars, which broadcast
+    together; each element of the result is bit-for-bit what `jday()`
+    returns for the same arguments.
+
+    """
+    import numpy as np
+
+    year, mon, day, hr, minute, sec = np.broadcast_arrays(
+        year, mon, day, hr, minute, sec)
+    jd, fr = jday(year, mon, day, hr, minute, sec)
+    return np.asarray(jd, dtype=float), np.asarray(fr, dtype=float)
+
+def jday_days_array(year, days):
+    """Return split ``(jd, fr)`` arrays for years and days of the year.
+
+    ``days`` counts from 1.0 at the start of January 1 of each ``year``,
+    as in a TLE epoch; the result is `jday_array()` of the date and
+    time that `days2mdhms_array()` finds.
+
+    """
+    return jday_array(year, *days2mdhms_array(year, days))
+
+def days2mdhms_array(year, days, round_to_microsecond=6):
+    """Array version of `days2mdhms()`.
+
+    Returns arrays of month, day, hour, minute, and seconds, each
+    element matching what `days2mdhms()` returns for it.
+
+    """
+    import numpy as np
+
+    year, days = np.broadcast_arrays(np.asarray(year), np.asarray(days))
+    second = days * 86400.0
+    if round_to_microsecond:
+        second = _round_array(second, round_to_microsecond)
+
+    minute, second = np.divmod(second, 60.0)
+    if round_to_microsecond:
+        second = _round_array(second, round_to_microsecond)
+
+    minute = minute.astype(np.int64)
+    hour, minute = np.divmod(minute, 60)
+    day_of_year, hour = np.divmod(hour, 24)
+
+    is_leap = (year % 400 == 0) | ((year % 4 == 0) & (year % 100 != 0))
+    month, day = _day_of_year_to_month_day(day_of_year, is_leap)
+    overflow = month == 13  # behave like the original in case of overflow
+    month = np.where(overflow, 12, month)
+    day = np.where(overflow, day + 31, day)
+
+    return month, day, hour, minute, second
+
+def _round_array(x, digits):
+    """Round like the built-in ``round()``, element by element."""
+    import numpy as np
+
+    # Scaling is exact enough except within a hair of a tie, where only
+    # the built-in's exact decimal rounding gives the same answer.
+    x = np.asarray(x, dtype=float)
+    scale = 10.0 ** digits
+    scaled = x * scale
+    whole = np.rint(scaled)
+    result = np.array(whole / scale)
+    tie = np.abs(np.abs(scaled - whole) - 0.5) <= 1e-12 * np.abs(scaled)
+    if tie.any():
+        result[tie] = [round(value, digits) for value in x[tie].tolist()]
+    return result
+
 def _day_of_year_to_month_day(day_of_year, is_leap):
     """Core logic for turning days into months, for easy testing."""
     february_bump = (2 - is_leap) * (day_of_year >= 60 + is_leap)
@@ -0,0 +1,116 @@
+"""Look up and propagate the element sets of a satellite over time.
+
+A ``History`` holds many element sets for each catalog number, as read
+from an archive by the ``catalog`` readers, sorted by satellite and by
+epoch.  For any array of times it finds, with one binary search, which
+element set applies at each moment, and it can propagate one satellite
+across a long span by switching element sets along the way, with each
+element set's run of times propagated by a single array call.
+
+"""
+import numpy as np
+
+from orbit_determination.alpha5 import from_alpha5
+from orbit_determination.model import WGS72
+from orbit_determination.vectorized import Columns, propagate
+
+minutes_per_day = 1440.
+
+
+class History(object):
+    """An index of element sets by satellite number and epoch.
+
+    ``records`` is a structured array from ``catalog.parse_tle()``,
+    ``iter_tle()`` or the ``omm`` readers, in any order.  ``columns``
+    holds their initialized coefficients as returned by
+    ``catalog.initialize()``; if omitted, the records are initialized
+    here with ``whichconst`` and ``opsmode``.
+
+    """
+    def __init__(self, records, columns=None, whichconst=WGS72,
+                 opsmode='i'):
+        if columns is None:
+            from orbit_determination.catalog import initialize
+            columns = initialize(records, whichconst, opsmode)
+
+        epochs = records['jdsatepoch'] + records['jdsatepochF']
+        order = np.lexsort((epochs, records['satnum']))
+        self.records = records[order]
+        self.epochs = epochs[order]
+        self.columns = Columns(columns.data[:, order], columns.fields)
+
+        self.satnums, starts, counts = np.unique(
+            self.records['satnum'], return_index=True, return_counts=True)
+        self._starts = starts
+        self._stops = starts + counts
+
+    def __len__(self):
+        return len(self.records)
+
+    def __contains__(self, satnum):
+        return self._find(satnum) is not None
+
+    def select(self, satnum, jd, fr=0.0, rule='nearest'):
+        """Return which element set applies at each of an array of times.
+
+        ``satnum`` is a catalog number, or its Alpha-5 string.  Returns
+        indexes into ``self.records`` shaped like ``jd + fr``.  With
+        ``rule='nearest'`` each time gets the element set whose epoch is
+        closest to it; with ``rule='previous'`` it gets the latest one
+        whose epoch is not after it.  Times before the satellite's first
+        epoch get its first element set under either rule.
+
+        """
+        if rule not in ('nearest', 'previous'):
+            raise ValueError("rule must be 'nearest' or 'previous'")
+        span = self._find(satnum)
+        if span is None:
+            raise KeyError(satnum)
+        start, stop = span
+
+        t = np.asarray(jd, dtype=float) + np.asarray(fr, dtype=float)
+        epochs = self.epochs[start:stop]
+        k = np.searchsorted(epochs, t, side='right') - 1
+        k = np.maximum(k, 0)
+        if rule == 'nearest':
+            later = np.minimum(k + 1, len(epochs) - 1)
+            closer = epochs[later] - t < t - epochs[k]
+            k = np.where(closer, later, k)
+        return start + k
+
+    def sgp4(self, satnum, jd, fr, rule='nearest'):
+        """Propagate one satellite, switching element sets as time passes.
+
+        Each time is propagated with the element set that `select()`
+        picks for it.  The times that share an element set are batched
+        into a single array propagation.  Returns an error-code array
+        and position and velocity arrays shaped like those of
+        ``Satrec.sgp4_array()``.
+
+        """
+        jd, fr = np.broadcast_arrays(np.asarray(jd, dtype=float),
+                                     np.asarray(fr, dtype=float))
+        index = self.select(satnum, jd, fr, rule)
+
+        e = np.zeros(jd.shape, dtype=int)
+        r = np.empty(jd.shape + (3,))
+        v = np.empty(jd.shape + (3,))
+        data = self.columns.data
+        jdsatepoch = self.columns.jdsatepoch[:, 0]
+        jdsatepochF = self.columns.jdsatepochF[:, 0]
+
+        for i in np.unique(index):
+            mask = index == i
+            tsince = ((jd[mask] - jdsatepoch[i]) * minutes_per_day +
+                      (fr[mask] - jdsatepochF[i]) * minutes_per_day)
+            e[mask], r[mask], v[mask] = propagate(data[:, i], tsince)
+
+        return e, r, v
+
+    def _find(self, satnum):
+        if isinstance(satnum, str):
+            satnum = from_alpha5(satnum)
+        i = np.searchsorted(self.satnums, satnum)
+        if i == len(self.satnums) or self.satnums[i] != satnum:
+            return None
+        return self._starts[i], self._stops[i]
@@ -98,7 +98,8 @@ with an N where each digit should go, followed by the line you provided:
   --------------------------------------------------------------------------- */
 """
 
-def twoline2rv(longstr1, longstr2, whichconst, opsmode='i', satrec=None):
+def twoline2rv(longstr1, longstr2, whichconst, opsmode='i', satrec=None,
+               initialize=True):
     """Return a Satellite imported from two lines of TLE data.
 
     Provide the two TLE lines as strings `longstr1` and `longstr2`,
@@ -113,6 +114,9 @@ def twoline2rv(longstr1, longstr2, whichconst, opsmode='i', satrec=None):
     to the algorithm.  If you want to turn some of these off and go
     back into "opsmode" mode, then set `opsmode` to `a`.
 
+    If `initialize` is false, the elements are only parsed and converted
+    to SGP4 units, and the caller is left to run `sgp4init()` later.
+
     """
 
     deg2rad  =   pi / 180.0;         #    0.0174532925199433
@@ -239,6 +243,9 @@ def twoline2rv(longstr1, longstr2, whichconst, opsmode='i', satrec=None):
         satrec.epoch = datetime(year, mon, day, hr, minute, int(sec_whole),
                                 int(sec_fraction * 1000000.0 // 1.0))
 
+    if not initialize:
+        return satrec
+
     #  ---------------- initialize the orbit at sgp4epoch -------------------
     sgp4init(whichconst, opsmode, satrec.satnum_str, satrec.jdsatepoch-2433281.5, satrec.bstar,
              satrec.ndot, satrec.nddot, satrec.ecco, satrec.argpo, satrec.inclo, satrec.mo,
@@ -1,4 +1,5 @@
 import orbit_determination # (사용 여부 미확인, 아마 SGP4 보조)
+from threading import RLock
 from orbit_determination.alpha5 import from_alpha5 # 위성 번호 변환
 from orbit_determination.earth_gravity import wgs72old, wgs72, wgs84 # 중력 모델 상수
 from orbit_determination.ext import invjday, jday # 율리우스일 변환
@@ -11,12 +12,13 @@ graph TD
   B --> C[Satrec 객체 초기화]
   C --> D[SGP4init 내부 호출로 orbital elements 설정]
   D --> E[jdsatepoch, epochdays 계산]
+  E --> K[coefficients: 첫 접근 시 읽기 전용 계수 벡터로 고정]
   E --> F[전파 호출: sgp4(jd, fr) or sgp4_tsince(t)]
   F --> G[전파결과: 위치 r, 속도 v, 에러코드 반환]
 
   subgraph 다중 위성 전파 (SatrecArray)
-    H[여러 Satrec 객체 리스트] --> I[sgp4(jd, fr) 루프 호출]
-    I --> J[모든 r,v 결과 배열화]
+    H[여러 Satrec 객체 리스트] --> I[계수를 필드별 numpy 열로 패킹]
+    I --> J[sgp4(jd, fr): 위성 x 시간 격자 배열 연산]
   end
 
 """
@@ -27,20 +29,26 @@ WGS84 = 2
 gravity_constants = wgs72old, wgs72, wgs84
 minutes_per_day = 1440.
 
+# 지연 초기화(lazy=True)를 한 번만 수행하도록 보호
+_initialization_lock = RLock()
+
 class Satrec(object):
     
     __slots__ = (
         'Om', 'a', 'alta', 'altp', 'am', 'argpdot', 'argpo', 'atime', 'aycof',
-        'bstar', 'cc1', 'cc4', 'cc5', 'classification', 'con41', 'd2', 'd2201',
+        'bstar', 'cc1', 'cc4', 'cc5', 'classification', '_coefficients',
+        'con41', 'd2', 'd2201',
         'd2211', 'd3', 'd3210', 'd3222', 'd4', 'd4410', 'd4422', 'd5220',
         'd5232', 'd5421', 'd5433', 'dedt', 'del1', 'del2', 'del3', 'delmo',
-        'didt', 'dmdt', 'dnodt', 'domdt', 'e3', 'ecco', 'ee2', 'elnum', 'em',
+        'didt', 'dmdt', 'dnodt', 'domdt', 'dspace_checkpoints', 'e3', 'ecco',
+        'ee2', 'elnum', 'em', 'pending_init',
         'ephtype', 'epoch', 'epochdays', 'epochyr', 'error', 'error_message',
         'eta', 'gsto', 'im', 'inclo', 'init', 'intldesg', 'irez', 'isimp',
         'j2', 'j3', 'j3oj2', 'j4', 'jdsatepoch', 'mdot', 'method', 'mm', 'mo',
         'mu', 'nddot', 'ndot', 'nm', 'no_kozai', 'no_unkozai', 'nodecf',
         'nodedot', 'nodeo', 'om', 'omgcof', 'operationmode', 'peo', 'pgho',
-        'pho', 'pinco', 'plo', 'radiusearthkm', 'revnum', 'satnum_str', 'se2',
+        'pho', 'pinco', 'plo', 'radiusearthkm', 'revnum', 'satnum_cache',
+        'satnum_str', 'se2',
         'se3', 'sgh2', 'sgh3', 'sgh4', 'sh2', 'sh3', 'si2', 'si3', 'sinmao',
         'sl2', 'sl3', 'sl4', 't', 't2cof', 't3cof', 't4cof', 't5cof', 'tumin',
         'x1mth2', 'x7thm1', 'xfact', 'xgh2', 'xgh3', 'xgh4',
@@ -51,20 +59,32 @@ class Satrec(object):
 
     array = None
 
+    def __init__(self):
+        self.pending_init = None
+        self._coefficients = None
+
     @property
     def no(self):
         return self.no_kozai
 
+    # satnum_str가 바뀌지 않는 한 디코딩 결과를 재사용
     @property
     def satnum(self):
-        return from_alpha5(self.satnum_str)
+        satnum_str = self.satnum_str
+        cache = getattr(self, 'satnum_cache', None)
+        if cache is None or cache[0] is not satnum_str:
+            cache = satnum_str, from_alpha5(satnum_str)
+            self.satnum_cache = cache
+        return cache[1]
 
     @classmethod
     # TLE 데이터를 받아 Satrec 객체로 초기화
-    def twoline2rv(cls, line1, line2, whichconst=WGS72):
+    # lazy=True 이면 파싱만 하고 sgp4init은 첫 전파 호출까지 미룸
+    def twoline2rv(cls, line1, line2, whichconst=WGS72, lazy=False):
         whichconst = gravity_constants[whichconst]
         self = cls()
-        twoline2rv(line1, line2, whichconst, 'i', self)
+        twoline2rv(line1, line2, whichconst, 'i', self, not lazy)
+        epoch = self.jdsatepoch - 2433281.5
 
         self.ephtype = int(self.ephtype.strip() or '0')
         self.revnum = int(self.revnum)
@@ -77,8 +97,25 @@ class Satrec(object):
         del self.epoch
 
         self.epochyr %= 100
+        if lazy:
+            self.pending_init = whichconst, 'i', epoch
+        else:
+            self._reset_coefficients()
         return self
 
+    # 지연된 sgp4init이 남아 있으면 (스레드 안전하게 한 번만) 수행
+    def ensure_initialized(self):
+        with _initialization_lock:
+            pending = self.pending_init
+            if pending is None:
+                return
+            whichconst, opsmode, epoch = pending
+            sgp4init(whichconst, opsmode, self.satnum_str, epoch, self.bstar,
+                     self.ndot, self.nddot, self.ecco, self.argpo,
+                     self.inclo, self.mo, self.no_kozai, self.nodeo, self)
+            self._reset_coefficients()
+            self.pending_init = None
+
     # 사용자 정의 orbital elements로 초기화
     def sgp4init(self, whichconst, opsmode, satnum, epoch, bstar,
                  ndot, nddot, ecco, argpo, inclo, mo, no_kozai, nodeo):
@@ -101,9 +138,33 @@ class Satrec(object):
 
         sgp4init(whichconst, opsmode, satnum, epoch, bstar, ndot, nddot,
                  ecco, argpo, inclo, mo, no_kozai, nodeo, self)
+        self._reset_coefficients()
+        self.pending_init = None
+
+    # 초기화 직후의 계수 벡터를 버리고 다시 만들도록 표시
+    # 심우주 위성은 스칼라 sgp4가 con41 등 일부 계수를 전파 중에 덮어쓰므로 바로 고정
+    def _reset_coefficients(self):
+        self._coefficients = None
+        if self.method == 'd':
+            from orbit_determination.vectorized import freeze
+            self._coefficients = freeze(self)
+
+    # 초기화된 계수를 읽기 전용 벡터로 고정 (propagate()의 입력)
+    # 스칼라 전파만 쓰는 근지구 위성은 비용이 없도록 첫 접근 시에 만들고 재사용
+    @property
+    def coefficients(self):
+        if self.pending_init is not None:
+            self.ensure_initialized()
+        coefficients = self._coefficients
+        if coefficients is None:
+            from orbit_determination.vectorized import freeze
+            coefficients = self._coefficients = freeze(self)
+        return coefficients
 
     # 특정 율리우스 날짜에서 r, v 전파
     def sgp4(self, jd, fr):
+        if self.pending_init is not None:
+            self.ensure_initialized()
         tsince = ((jd - self.jdsatepoch) * minutes_per_day +
                   (fr - self.jdsatepochF) * minutes_per_day)
         r, v = sgp4(self, tsince)
@@ -111,62 +172,96 @@ class Satrec(object):
     
     # epoch 이후 tsince (minutes) 기준 전파
     def sgp4_tsince(self, tsince):
+        if self.pending_init is not None:
+            self.ensure_initialized()
         r, v = sgp4(self, tsince)
         return self.error, r, v
 
     # 특정 시간 간격으로 r,v 값을 numpy array 로 표현#
     def sgp4_array(self, jd, fr):
-        
+        if self.pending_init is not None:
+            self.ensure_initialized()
+
         array = self.array
         if array is None:
             from numpy import array
             Satrec.array = array
 
-        results = []
-        z = list(zip(jd, fr))
-        for jd_i, fr_i in z:
-            results.append(self.sgp4(jd_i, fr_i))
-        elist, rlist, vlist = zip(*results)
-
-        e = array(elist)
-        r = array(rlist)
-        v = array(vlist)
-
-        r.shape = v.shape = len(jd), 3
-        return e, r, v
+        # 시간 배열 전체를 한 번에 전파
+        from orbit_determination.vectorized import sgp4_deep, sgp4_near
+        jd = array(jd, dtype=float)
+        fr = array(fr, dtype=float)
+        tsince = ((jd - self.jdsatepoch) * minutes_per_day +
+                  (fr - self.jdsatepochF) * minutes_per_day)
+        if self.method == 'd':
+            return sgp4_deep(self, tsince)
+        return sgp4_near(self, tsince)
 
 
 # 복수 위성에 대한 전파 처리
 class SatrecArray(object):
-    
-    __slots__ = ('_satrecs',)
+    """Propagate many satellites at once.
+
+    At construction the satellites are partitioned by ``method``,
+    ``isimp`` and ``irez``, and the coefficients of each group are
+    packed into contiguous per-field NumPy columns.  `sgp4()` then
+    evaluates each group's satellites-by-times grid with broadcast
+    array math on the code path specialized for it, so simple-drag
+    near-earth satellites never pay for drag or deep-space terms they
+    do not use, and scatters the results back into the original order.
+
+    """
+    __slots__ = ('_satrecs', '_groups', '_length')
 
     array = None
 
     def __init__(self, satrecs):
         self._satrecs = satrecs
-        
+        self._length = len(satrecs)
+
         if self.array is None:
             from numpy import array
             SatrecArray.array = array
 
+        for sat in satrecs:
+            if getattr(sat, 'pending_init', None) is not None:
+                sat.ensure_initialized()
+
+        from orbit_determination.vectorized import partition
+        self._groups = partition(satrecs)
+
+    @classmethod
+    # sgp4init_array() 등으로 이미 패킹된 계수 열에서 바로 생성
+    def from_columns(cls, columns):
+        self = cls.__new__(cls)
+        self._satrecs = None
+        self._length = len(columns)
+
+        if cls.array is None:
+            from numpy import array
+            SatrecArray.array = array
+
+        from orbit_determination.vectorized import partition_columns
+        self._groups = partition_columns(columns)
+        return self
+
     def sgp4(self, jd, fr):
-        
-        results = []
-        z = list(zip(jd, fr))
-        for satrec in self._satrecs:
-            for jd_i, fr_i in z:
-                results.append(satrec.sgp4(jd_i, fr_i))
-        elist, rlist, vlist = zip(*results)
-
-        e = self.array(elist)
-        r = self.array(rlist)
-        v = self.array(vlist)
+
+        from numpy import empty, zeros
+
+        jd = self.array(jd, dtype=float)
+        fr = self.array(fr, dtype=float)
 
         jdlen = len(jd)
-        mylen = len(self._satrecs)
-        e.shape = (mylen, jdlen)
-        r.shape = v.shape = (mylen, jdlen, 3) 
+        mylen = self._length
+        e = zeros((mylen, jdlen), dtype=int)
+        r = empty((mylen, jdlen, 3))
+        v = empty((mylen, jdlen, 3))
+
+        # 그룹별 (위성 x 시간) 격자를 배열 연산으로 전파한 뒤 원래 순서로 배치
+        for index, columns, kernel in self._groups:
+            tsince = columns.tsince(jd, fr)
+            e[index], r[index], v[index] = kernel(columns, tsince)
 
         return e, r, v
 
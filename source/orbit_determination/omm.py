@@ -0,0 +1,153 @@
+"""Read CCSDS Orbit Mean-Elements Messages (OMM) in bulk.
+
+CelesTrak's ``gp.php`` serves the same general perturbations elements
+as TLE text in CSV, XML and JSON form.  These formats spell out every
+field by name, carry full catalog numbers beyond the Alpha-5 limit, and
+are simpler to parse than punch-card columns.  Each reader here returns
+the structured array of ``catalog.NAMED_RECORD_DTYPE`` that the TLE
+readers produce, holding the same values the TLE of each satellite
+would give, so that ``catalog.initialize()`` runs ``sgp4init()`` on
+exactly the same elements whichever format was downloaded.
+
+"""
+import csv
+import json
+import numpy as np
+from xml.etree import ElementTree
+
+from orbit_determination.catalog import (
+    NAMED_RECORD_DTYPE, POWERS_OFFSET, _powers_of_ten, deg2rad, fill_epoch,
+    xpdotp)
+
+# The OMM fields that the readers use.
+FIELDS = (
+    'OBJECT_NAME', 'OBJECT_ID', 'EPOCH', 'MEAN_MOTION', 'ECCENTRICITY',
+    'INCLINATION', 'RA_OF_ASC_NODE', 'ARG_OF_PERICENTER', 'MEAN_ANOMALY',
+    'EPHEMERIS_TYPE', 'CLASSIFICATION_TYPE', 'NORAD_CAT_ID',
+    'ELEMENT_SET_NO', 'REV_AT_EPOCH', 'BSTAR', 'MEAN_MOTION_DOT',
+    'MEAN_MOTION_DDOT',
+)
+
+
+def parse_csv(file):
+    """Parse an OMM CSV document from a text file object."""
+    rows = csv.reader(file)
+    header = next(rows, None)
+    if header is None:
+        return np.empty(0, NAMED_RECORD_DTYPE)
+    columns = list(zip(*rows))
+    if not columns:
+        columns = [()] * len(header)
+    return parse_columns(dict(zip(header, columns)))
+
+
+def parse_xml(file):
+    """Parse an OMM XML document from a file object or path."""
+    root = ElementTree.parse(file).getroot()
+    return parse_dicts(_segment_fields(segment)
+                       for segment in root.iter('segment'))
+
+
+def parse_json(file):
+    """Parse an OMM JSON document, a list of objects, from a file object."""
+    return parse_dicts(json.load(file))
+
+
+def parse_dicts(dicts):
+    """Build records from an iterable of OMM field dictionaries."""
+    dicts = list(dicts)
+    return parse_columns(dict((name, [d[name] for d in dicts])
+                              for name in FIELDS))
+
+
+def parse_columns(columns):
+    """Build records from a mapping of OMM field names to sequences.
+
+    Every field in ``FIELDS`` must be present.  Numeric fields may be
+    numbers or decimal strings, and ``EPOCH`` ISO 8601 strings.
+
+    """
+    count = len(columns['EPOCH'])
+    records = np.empty(count, NAMED_RECORD_DTYPE)
+    if not count:
+        return records
+
+    def number(name, dtype=float):
+        return np.asarray(columns[name]).astype(dtype)
+
+    records['name'] = columns['OBJECT_NAME']
+    records['satnum'] = number('NORAD_CAT_ID', int)
+    records['classification'] = [c or 'U' for c in
+                                 columns['CLASSIFICATION_TYPE']]
+    records['intldesg'] = [_intldesg(i) for i in columns['OBJECT_ID']]
+    records['ephtype'] = number('EPHEMERIS_TYPE', int)
+    records['elnum'] = number('ELEMENT_SET_NO', int)
+    records['revnum'] = number('REV_AT_EPOCH', int)
+
+    #  ---- convert to sgp4 units, as twoline2rv() does ----
+    records['no_kozai'] = number('MEAN_MOTION') / xpdotp
+    records['bstar'] = _tle_exponential(columns['BSTAR'])
+    records['ndot'] = number('MEAN_MOTION_DOT') / (xpdotp*1440.0)
+    records['nddot'] = (_tle_exponential(columns['MEAN_MOTION_DDOT']) /
+                        (xpdotp*1440.0*1440))
+    records['inclo'] = number('INCLINATION') * deg2rad
+    records['nodeo'] = number('RA_OF_ASC_NODE') * deg2rad
+    records['ecco'] = number('ECCENTRICITY')
+    records['argpo'] = number('ARG_OF_PERICENTER') * deg2rad
+    records['mo'] = number('MEAN_ANOMALY') * deg2rad
+
+    # A TLE states its epoch to 1e-8 day, which the OMM epoch repeats to
+    # the nearest microsecond; rounding back recovers the TLE's value.
+    epoch = np.array(columns['EPOCH'], dtype='datetime64[us]')
+    start = epoch.astype('datetime64[Y]')
+    year = start.astype(int) + 1970
+    microseconds = (epoch - start).astype(np.int64)
+    epochdays = np.round(1.0 + microseconds / 86400e6, 8)
+    fill_epoch(records, year, epochdays)
+
+    return records
+
+
+def _segment_fields(segment):
+    fields = {}
+    metadata = segment.find('metadata')
+    data = segment.find('data')
+    for element in (metadata, data.find('meanElements'),
+                    data.find('tleParameters')):
+        if element is not None:
+            fields.update((field.tag, field.text) for field in element)
+    return fields
+
+
+def _intldesg(object_id):
+    # OMM "1998-067A" is TLE "98067A".
+    object_id = object_id or ''
+    if len(object_id) > 5 and object_id[4] == '-':
+        return object_id[2:4] + object_id[5:]
+    return object_id
+
+
+def _tle_exponential(values):
+    # A TLE stores bstar and nddot as a five-digit mantissa below 1.0
+    # and a one-digit power of ten; rebuild that pair from each value,
+    # rounding as '%.4e' would, and combine them as twoline2rv() does.
+    values = np.asarray(values).astype(float)
+    magnitude = np.abs(values)
+    # Values below 1e-300, far beneath any real drag term, become zero.
+    nonzero = magnitude >= 1e-300
+    exponent = np.zeros(values.shape, int)
+    exponent[nonzero] = np.floor(np.log10(magnitude[nonzero]))
+
+    # Exponents are kept as indexes into catalog._powers_of_ten, whose
+    # math.pow() values match twoline2rv() where NumPy's power() can be
+    # off in the last place.  log10() can land one off either side of
+    # an exact power of ten.
+    exponent += POWERS_OFFSET
+    exponent += magnitude >= _powers_of_ten[exponent + 1]
+    exponent -= nonzero & (magnitude < _powers_of_ten[exponent])
+
+    digits = np.round(values / _powers_of_ten[exponent - 4])
+    carry = np.abs(digits) >= 1e5
+    digits[carry] = np.round(digits[carry] / 10.0)
+    exponent[carry] += 1
+    return digits / 1e5 * _powers_of_ten[exponent + 1]
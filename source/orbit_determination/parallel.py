@@ -0,0 +1,357 @@
+"""Propagate a whole satellite catalog across several processes.
+
+A ``CatalogPropagator`` splits a catalog into contiguous shards of
+satellites and hands the shards to a pool of worker processes.  Each
+worker receives the catalog's frozen coefficient vectors once, when it
+starts, and partitions a shard into its kernel groups the first time it
+is asked to propagate that shard; later time windows reuse the warm
+groups, so repeated calls only pay for the array math itself.
+
+`CatalogPropagator.sgp4_shared()` avoids sending results back through
+pickles: the parent allocates the output arrays in shared memory as a
+``SharedOutput`` and each worker writes its slice of satellites in place.
+
+`ingest_tle()` spreads the reading of a large TLE archive the same way:
+the file is split into byte ranges at record boundaries, and each worker
+parses, and optionally initializes, its own range.
+
+"""
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+import os
+import sys
+
+import numpy as np
+
+from orbit_determination import catalog
+from orbit_determination.catalog import open_cache
+from orbit_determination.model import WGS72
+from orbit_determination.vectorized import (
+    COEFFICIENT_FIELDS, Columns, partition_columns)
+
+# State of a worker process: the stacked coefficient vectors of the
+# whole catalog, the groups of each shard propagated so far, and
+# whether the process shares its parent's resource tracker.
+_catalog = None
+_shards = {}
+_inherited_tracker = False
+
+
+class CatalogPropagator(object):
+    """Propagate many satellites in parallel worker processes.
+
+    ``satrecs`` is a sequence of initialized ``Satrec`` objects, or a
+    ``Columns`` in the ``COEFFICIENT_FIELDS`` layout such as those from
+    ``catalog.initialize()``; `from_cache()` instead lets each worker
+    map a catalog cache file itself.  ``workers`` is the number of
+    processes, defaulting to the number of CPUs, and ``chunk_size`` is
+    the number of satellites in each shard, defaulting to an even split
+    of the catalog across the workers.
+
+    Use the propagator as a context manager, or call `close()` when
+    done, so that the worker processes are shut down.
+
+    """
+    def __init__(self, satrecs, workers=None, chunk_size=None):
+        if isinstance(satrecs, Columns):
+            catalog = satrecs.data
+        else:
+            for sat in satrecs:
+                if getattr(sat, 'pending_init', None) is not None:
+                    sat.ensure_initialized()
+            catalog = np.stack([sat.coefficients for sat in satrecs], axis=1)
+        self._start(len(satrecs), workers, chunk_size,
+                    _initialize, (catalog,))
+
+    @classmethod
+    def from_cache(cls, path, workers=None, chunk_size=None):
+        """Propagate the satellites of a catalog cache file.
+
+        Each worker maps the file written by ``catalog.save_cache()``
+        read-only, so nothing is initialized or sent to the workers.
+
+        """
+        records, columns = open_cache(path)
+        self = cls.__new__(cls)
+        self._start(len(columns), workers, chunk_size,
+                    _initialize_from_cache, (path,))
+        return self
+
+    def _start(self, n, workers, chunk_size, initializer, initargs):
+        if workers is None:
+            workers = os.cpu_count() or 1
+        if chunk_size is None:
+            chunk_size = max(-(-n // workers), 1)
+        if workers < 1 or chunk_size < 1:
+            raise ValueError('workers and chunk_size must be positive')
+
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self._length = n
+        self._bounds = [(start, min(start + chunk_size, n))
+                        for start in range(0, n, chunk_size)]
+
+        self._executor = ProcessPoolExecutor(
+            workers, initializer=initializer, initargs=initargs)
+
+    def __len__(self):
+        return self._length
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """Shut down the worker processes."""
+        self._executor.shutdown()
+
+    def sgp4(self, jd, fr):
+        """Propagate every satellite to the given Julian dates.
+
+        Returns an error-code array shaped ``(n_sat, n_time)`` and
+        position and velocity arrays shaped ``(n_sat, n_time, 3)``, in
+        the same satellite order as the catalog.
+
+        """
+        jd = np.asarray(jd, dtype=float)
+        fr = np.asarray(fr, dtype=float)
+
+        n_time = len(jd)
+        e = np.zeros((self._length, n_time), dtype=int)
+        r = np.empty((self._length, n_time, 3))
+        v = np.empty((self._length, n_time, 3))
+
+        futures = [self._executor.submit(_propagate, start, stop, jd, fr)
+                   for start, stop in self._bounds]
+        for (start, stop), future in zip(self._bounds, futures):
+            e[start:stop], r[start:stop], v[start:stop] = future.result()
+
+        return e, r, v
+
+    def sgp4_shared(self, jd, fr, out=None):
+        """Propagate every satellite into shared-memory output arrays.
+
+        Like `sgp4()`, but returns a ``SharedOutput`` whose ``e``, ``r``
+        and ``v`` arrays the workers filled in place.  Pass the
+        ``SharedOutput`` from an earlier call as ``out`` to reuse its
+        segments for a new window with the same number of times.  The
+        caller owns the segments and must `release()` them.
+
+        """
+        jd = np.asarray(jd, dtype=float)
+        fr = np.asarray(fr, dtype=float)
+
+        if out is None:
+            out = SharedOutput(self._length, len(jd))
+        elif out.e is None or out.e.shape != (self._length, len(jd)):
+            raise ValueError('out does not match the catalog and time grid')
+
+        specs = out.specs()
+        futures = [self._executor.submit(_propagate_into, start, stop,
+                                         jd, fr, specs)
+                   for start, stop in self._bounds]
+        for future in futures:
+            future.result()
+
+        return out
+
+
+class SharedOutput(object):
+    """Error, position and velocity arrays backed by shared memory.
+
+    The ``e``, ``r`` and ``v`` attributes are NumPy views straight onto
+    ``multiprocessing.shared_memory`` segments, shaped ``(n_sat,
+    n_time)`` and ``(n_sat, n_time, 3)``.  The segments stay allocated
+    until `release()` is called, or the ``with`` block that holds the
+    ``SharedOutput`` exits; copy any arrays that should outlive it, and
+    drop other references to the views first, since a segment cannot
+    be closed while a view of it is still alive.
+
+    """
+    def __init__(self, n_sat, n_time):
+        self._blocks = []
+        self.e = self._allocate((n_sat, n_time), int)
+        self.r = self._allocate((n_sat, n_time, 3), float)
+        self.v = self._allocate((n_sat, n_time, 3), float)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.release()
+
+    def _allocate(self, shape, dtype):
+        dtype = np.dtype(dtype)
+        size = max(int(np.prod(shape)) * dtype.itemsize, 1)
+        block = SharedMemory(create=True, size=size)
+        self._blocks.append(block)
+        return np.ndarray(shape, dtype, buffer=block.buf)
+
+    def specs(self):
+        """Return the ``(name, shape, dtype)`` of each segment."""
+        return [(block.name, array.shape, array.dtype.str)
+                for block, array in zip(self._blocks, (self.e, self.r, self.v))]
+
+    def release(self):
+        """Drop the views, then close and unlink the shared segments.
+
+        Every segment is unlinked even if a view of it is still alive
+        elsewhere, in which case the ``BufferError`` from closing it is
+        raised once all the segments have been unlinked.
+
+        """
+        self.e = self.r = self.v = None
+        blocks, self._blocks = self._blocks, []
+        error = None
+        for block in blocks:
+            try:
+                block.close()
+            except BufferError as e:
+                error = error or e
+            block.unlink()
+        if error is not None:
+            raise error
+
+
+def ingest_tle(path, workers=None, batch_size=10000, names=False,
+               errors='raise', skipped=None, initialize=False,
+               whichconst=WGS72, opsmode='i'):
+    """Read a TLE file with several worker processes.
+
+    The file is cut with ``catalog.split_tle()`` into one byte range per
+    worker, ``workers`` defaulting to the number of CPUs.  Each worker
+    streams its range through ``catalog.iter_tle()`` with ``batch_size``,
+    ``names`` and ``errors``, and the records come back joined in file
+    order; ``skipped`` receives the same ``(line_number, line)`` entries
+    a single `iter_tle()` pass would give it.
+
+    With ``initialize=True`` each worker also runs
+    ``catalog.initialize()`` on its records, and ``(records, columns)``
+    is returned, ready for ``catalog.save_cache()``.
+
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers < 1:
+        raise ValueError('workers must be positive')
+    if errors not in ('raise', 'skip'):
+        raise ValueError("errors must be 'raise' or 'skip'")
+
+    ranges = catalog.split_tle(path, workers)
+    with ProcessPoolExecutor(max(len(ranges), 1)) as executor:
+        futures = [executor.submit(_ingest, path, start, stop, batch_size,
+                                   names, errors, initialize, whichconst,
+                                   opsmode)
+                   for start, stop in ranges]
+        results = [future.result() for future in futures]
+
+    dtype = catalog.NAMED_RECORD_DTYPE if names else catalog.RECORD_DTYPE
+    records = np.concatenate([np.empty(0, dtype)] +
+                             [result[0] for result in results])
+
+    # Line numbers in each range count from its own first line.
+    first = 0
+    for result in results:
+        if skipped is not None:
+            skipped.extend((first + number, line)
+                           for number, line in result[2])
+        first += result[3]
+
+    if not initialize:
+        return records
+    data = np.concatenate(
+        [np.empty((len(COEFFICIENT_FIELDS), 0))] +
+        [result[1] for result in results], axis=1)
+    return records, Columns(data, COEFFICIENT_FIELDS)
+
+
+def _ingest(path, start, stop, batch_size, names, errors, initialize,
+            whichconst, opsmode):
+    skipped = []
+    count = [0]
+    with open(path, 'rb') as f:
+        f.seek(start)
+        batches = list(catalog.iter_tle(_read_range(f, stop, count),
+                                        batch_size, names, errors, skipped))
+    dtype = catalog.NAMED_RECORD_DTYPE if names else catalog.RECORD_DTYPE
+    records = np.concatenate([np.empty(0, dtype)] + batches)
+
+    data = None
+    if initialize and len(records):
+        data = catalog.initialize(records, whichconst, opsmode).data
+    elif initialize:
+        data = np.empty((len(COEFFICIENT_FIELDS), 0))
+    return records, data, skipped, count[0]
+
+
+def _read_range(f, stop, count):
+    # Yields the lines of an open file up to byte offset stop, adding
+    # each to the one-element list count so the caller can read the
+    # total afterwards.
+    while f.tell() < stop:
+        line = f.readline()
+        if not line:
+            break
+        count[0] += 1
+        yield line
+
+
+def _initialize(catalog):
+    global _catalog, _inherited_tracker
+    _catalog = catalog
+    _shards.clear()
+    # Decided before the first attach, which may start a tracker.
+    _inherited_tracker = resource_tracker._resource_tracker._fd is not None
+
+
+def _initialize_from_cache(path):
+    records, columns = open_cache(path)
+    _initialize(columns.data)
+
+
+def _propagate(start, stop, jd, fr):
+    n = stop - start
+    e = np.zeros((n, len(jd)), dtype=int)
+    r = np.empty((n, len(jd), 3))
+    v = np.empty((n, len(jd), 3))
+    _fill(start, stop, jd, fr, e, r, v)
+    return e, r, v
+
+
+def _propagate_into(start, stop, jd, fr, specs):
+    blocks = [_attach(name) for name, shape, dtype in specs]
+    e, r, v = [np.ndarray(shape, dtype, buffer=block.buf)[start:stop]
+               for block, (name, shape, dtype) in zip(blocks, specs)]
+    _fill(start, stop, jd, fr, e, r, v)
+
+    # The views must go before the segments can be closed.
+    del e, r, v
+    for block in blocks:
+        block.close()
+
+
+def _attach(name):
+    # The parent owns the segment, so a worker must not leave it
+    # registered with a resource tracker of its own, which would unlink
+    # it when the worker exits.  Workers that inherited the parent's
+    # tracker share its single registration and leave it alone.
+    if sys.version_info >= (3, 13):
+        return SharedMemory(name=name, track=False)
+    block = SharedMemory(name=name)
+    if not _inherited_tracker:
+        resource_tracker.unregister(block._name, 'shared_memory')
+    return block
+
+
+def _fill(start, stop, jd, fr, e, r, v):
+    groups = _shards.get(start)
+    if groups is None:
+        shard = Columns(_catalog[:, start:stop], COEFFICIENT_FIELDS)
+        groups = _shards[start] = partition_columns(shard)
+
+    for index, columns, kernel in groups:
+        e[index], r[index], v[index] = kernel(columns, columns.tsince(jd, fr))
+
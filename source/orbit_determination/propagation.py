@@ -1,5 +1,6 @@
 import orbit_determination
 from math import atan2, cos, fabs, pi, sin, sqrt
+from threading import Lock
 from orbit_determination.alpha5 import to_alpha5
 
 deg2rad = pi / 180.0
@@ -8,6 +9,11 @@ false = (_nan, _nan, _nan)
 true = True
 twopi = 2.0 * pi
 
+# 공명 적분 체크포인트 표의 최대 길이 (720분 간격, 방향별 약 11년)
+DSPACE_CHECKPOINT_LIMIT = 8000
+# 같은 위성을 여러 스레드가 전파해도 체크포인트가 중복 추가되지 않도록 보호
+_checkpoint_lock = Lock()
+
 
 """
 /* -----------------------------------------------------------------------------
@@ -830,6 +836,10 @@ def _dsinit(
 *    mm          - mean anomaly
 *    xni         - mean motion
 *    nodem       - right ascension of ascending node
+*    checkpoints - optional (forward, backward) lists of integrator states
+*                  (xli, xni) at atime = k * stepp, filled in as they are
+*                  reached, so later calls resume from the nearest state;
+*                  each holds at most DSPACE_CHECKPOINT_LIMIT entries
 *
 *  outputs       :
 *    atime       -
@@ -876,6 +886,7 @@ def _dspace(
        no,
        atime, em,    argpm,  inclm, xli,
        mm,    xni,   nodem,  nm,
+       checkpoints=None,
        ):
 
      fasx2 = 0.13130908;
@@ -922,19 +933,36 @@ def _dspace(
      ft    = 0.0;
      if irez != 0:
 
-         #  sgp4fix streamline check
-         if atime == 0.0 or t * atime <= 0.0 or fabs(t) < fabs(atime):
-
-             atime  = 0.0;
-             xni    = no;
-             xli    = xlamo;
-
          # sgp4fix move check outside loop
          if t > 0.0:
                delt = stepp;
          else:
                delt = stepn;
 
+         if checkpoints is None:
+
+             #  sgp4fix streamline check
+             if atime == 0.0 or t * atime <= 0.0 or fabs(t) < fabs(atime):
+
+                 atime  = 0.0;
+                 xni    = no;
+                 xli    = xlamo;
+
+         else:
+
+             # 가장 가까운 체크포인트에서 적분 재개 (stepp 간격으로 저장)
+             table = checkpoints[0] if delt > 0.0 else checkpoints[1]
+             if not table:
+                 with _checkpoint_lock:
+                     if not table:
+                         table.append((xlamo, no))
+             k = len(table) - 1
+             steps = fabs(t) / stepp
+             if steps < len(table):
+                 k = max(int(steps) - 1, 0)
+             atime = k * delt;
+             xli, xni = table[k]
+
          iretn = 381; # added for do loop
          # iret  =   0; # added for loop
          while iretn == 381:
@@ -987,6 +1015,13 @@ def _dspace(
                  xni   = xni + xndt * delt + xnddt * step2;
                  atime = atime + delt;
 
+                 if checkpoints is not None:
+                     k += 1
+                     if k == len(table) and k < DSPACE_CHECKPOINT_LIMIT:
+                         with _checkpoint_lock:
+                             if k == len(table):
+                                 table.append((xli, xni))
+
          nm = xni + xndt * ft + xnddt * ft * ft * 0.5;
          xl = xli + xldot * ft + xndt * ft * ft * 0.5;
          if irez != 1:
@@ -1262,6 +1297,7 @@ def sgp4init(
      satrec.xl3   = 0.0; satrec.xl4   = 0.0; satrec.xlamo = 0.0;
      satrec.zmol  = 0.0; satrec.zmos  = 0.0; satrec.atime = 0.0;
      satrec.xli   = 0.0; satrec.xni   = 0.0;
+     satrec.dspace_checkpoints = None;
 
      #  ------------------------ earth constants -----------------------
      #  sgp4fix identify constants and allow alternate values
@@ -1499,6 +1535,10 @@ def sgp4init(
                    satrec.xlamo, satrec.xli,   satrec.xni
                  );
 
+             # per-satellite table of resonance integrator states
+             if satrec.irez != 0:
+                 satrec.dspace_checkpoints = ([], [])
+
          #----------- set variables if not deep space -----------
          if satrec.isimp != 1:
 
@@ -1693,7 +1733,7 @@ def sgp4(satrec, tsince, whichconst=None):
                satrec.gsto, satrec.xfact, satrec.xlamo,
                satrec.no_unkozai, satrec.atime,
                em, argpm, inclm, satrec.xli, mm, satrec.xni,
-               nodem, nm
+               nodem, nm, satrec.dspace_checkpoints
              );
 
      if nm <= 0.0:
@@ -0,0 +1,71 @@
+"""An evenly spaced grid of propagation times, built once as arrays.
+
+A ``TimeGrid`` holds every time of a propagation window as a
+``datetime64[ns]`` array together with its split Julian date, so that
+the propagator, the frame transforms and the output table all read the
+same arrays instead of converting one ``datetime`` object per step.
+
+"""
+import numpy as np
+
+from orbit_determination.conveniences import jday_datetime64
+from orbit_determination.vectorized import gstime
+
+minutes_per_day = 1440.
+
+
+class TimeGrid(object):
+    """The times ``start``, ``start + step``, ... of a window.
+
+    ``start`` is a ``datetime`` or ``datetime64`` in UTC, ``duration``
+    the length of the window in minutes and ``step`` the spacing in
+    seconds; the grid holds ``int(duration * 60 / step)`` times, as
+    ``OP.SGP4propagate()`` always has.  ``times`` holds them as
+    ``datetime64[ns]``, and ``jd`` and ``fr`` as the split Julian dates
+    that ``Satrec.sgp4_array()`` takes.  These arrays are read-only.
+
+    """
+    def __init__(self, start, duration, step):
+        count = int((duration * 60) / step)
+        start = np.datetime64(start, 'ns')
+        step = np.timedelta64(int(round(step * 1e6)), 'us')
+        self.times = start + np.arange(count) * step
+        self.jd, self.fr = jday_datetime64(self.times)
+        for array in self.times, self.jd, self.fr:
+            array.flags.writeable = False
+        self._gmst = None
+        self._time = None
+
+    def __len__(self):
+        return len(self.times)
+
+    def tsince(self, satrec):
+        """Return the minutes from the epoch of ``satrec`` to each time."""
+        return ((self.jd - satrec.jdsatepoch) * minutes_per_day +
+                (self.fr - satrec.jdsatepochF) * minutes_per_day)
+
+    @property
+    def gmst(self):
+        """Greenwich mean sidereal time in radians at each time.
+
+        Computed on first use with ``vectorized.gstime()`` from ``jd``
+        and ``fr`` treated as UT1, so every user of this grid shares
+        one read-only vector.
+
+        """
+        if self._gmst is None:
+            self._gmst = gstime(self.jd, self.fr)
+            self._gmst.flags.writeable = False
+        return self._gmst
+
+    def datetimes(self):
+        """Return the times as a list of ``datetime`` objects."""
+        return self.times.astype('datetime64[us]').tolist()
+
+    @property
+    def time(self):
+        """The times as one astropy ``Time`` array, built on first use."""
+        if self._time is None:
+            from astropy.time import Time
+            self._time = Time(self.times, format='datetime64', scale='utc')
+        return self._time
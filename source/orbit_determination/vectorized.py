@@ -0,0 +1,943 @@
+"""Array versions of the SGP4 propagation routines.
+
+The routines in ``propagation.py`` handle one satellite at one moment
+per call.  The routines here evaluate the same equations with NumPy
+across a whole array of times, so that a long trajectory costs a few
+dozen array operations instead of thousands of Python function calls.
+
+The arithmetic follows ``propagation.sgp4()`` line by line and in the
+same operation order, so results agree with the scalar routine to the
+last few units in the last place: NumPy's ``sin``, ``cos`` and ``pow``
+are not always bit-identical to the C library versions that ``math``
+uses.  How far those differences grow depends on the orbit and on
+the NumPy build.  Over the verification catalog, near-earth positions
+agree within about 1e-11 km.  Deep-space orbits, resonant ones
+included, carry the differences through their secular and resonance
+terms, so they agree only within 1e-6 km and 1e-9 km/s.  The worst
+case is 20413, at 2.6e-7 km and 2.2e-10 km/s; the resonant orbits
+stay near 2e-9 km.
+
+"""
+import numpy as np
+from math import pi
+from operator import attrgetter
+
+twopi = 2.0 * pi
+deg2rad = pi / 180.0
+x2o3 = 2.0 / 3.0
+minutes_per_day = 1440.
+
+# sgp4fix divisor for divide by zero check on inclination
+temp4 = 1.5e-12
+
+# Coefficients read by the near-earth kernel, plus the split epoch.
+NEAR_FIELDS = (
+    'jdsatepoch', 'jdsatepochF',
+    'argpdot', 'argpo', 'aycof', 'bstar', 'cc1', 'cc4', 'cc5', 'con41',
+    'd2', 'd3', 'd4', 'delmo', 'ecco', 'eta', 'inclo', 'isimp', 'j2',
+    'mdot', 'mo', 'no_unkozai', 'nodecf', 'nodedot', 'nodeo', 'omgcof',
+    'radiusearthkm', 'sinmao', 't2cof', 't3cof', 't4cof', 't5cof',
+    'x1mth2', 'x7thm1', 'xke', 'xlcof', 'xmcof',
+)
+
+# Extra coefficients read by the deep-space kernel.
+DEEP_FIELDS = NEAR_FIELDS + (
+    'd2201', 'd2211', 'd3210', 'd3222', 'd4410', 'd4422', 'd5220',
+    'd5232', 'd5421', 'd5433', 'dedt', 'del1', 'del2', 'del3', 'didt',
+    'dmdt', 'dnodt', 'domdt', 'e3', 'ee2', 'gsto', 'irez', 'j3oj2',
+    'operationmode', 'peo', 'pgho', 'pho', 'pinco', 'plo', 'se2', 'se3',
+    'sgh2', 'sgh3', 'sgh4', 'sh2', 'sh3', 'si2', 'si3', 'sl2', 'sl3',
+    'sl4', 'xfact', 'xgh2', 'xgh3', 'xgh4', 'xh2', 'xh3', 'xi2', 'xi3',
+    'xl2', 'xl3', 'xl4', 'xlamo', 'zmol', 'zmos',
+)
+
+# Fixed layout of the frozen coefficient vector built by ``freeze()``.
+COEFFICIENT_FIELDS = DEEP_FIELDS + ('method',)
+
+# Character flags are stored in the columns as numeric codes.
+FLAG_CODES = {
+    'method': {'n': 0.0, 'd': 1.0},
+    'operationmode': {'i': 0.0, 'a': 1.0},
+}
+
+# Reads every coefficient of a satellite at once, for freeze().
+_coefficient_values = attrgetter(*COEFFICIENT_FIELDS)
+_flag_positions = [(COEFFICIENT_FIELDS.index(name), codes)
+                   for name, codes in FLAG_CODES.items()]
+
+
+class Columns(object):
+    """Structure-of-arrays copy of the coefficients of many satellites.
+
+    Each field is stored as one contiguous row of the 2-D ``data``
+    array, and is also exposed as an attribute shaped ``(n_sat, 1)``
+    so that it broadcasts against a ``(n_sat, n_time)`` time grid.
+    The attribute names match those of ``Satrec``, which lets the
+    array kernels accept either a single satellite or a ``Columns``.
+    A 1-D ``data`` vector, like the one returned by ``freeze()``,
+    describes a single satellite and exposes each field as a scalar.
+
+    """
+    def __init__(self, data, fields):
+        self.data = data
+        self.fields = fields
+        if data.ndim == 1:
+            for i, name in enumerate(fields):
+                setattr(self, name, data[i])
+        else:
+            for i, name in enumerate(fields):
+                setattr(self, name, data[i, :, None])
+
+    def __len__(self):
+        return self.data.shape[1]
+
+    @classmethod
+    def pack(cls, satrecs, fields=NEAR_FIELDS):
+        """Copy the named fields of each satellite into columns."""
+        rows = [[_code(name, getattr(sat, name)) for sat in satrecs]
+                for name in fields]
+        data = np.array(rows, dtype=float)
+        data.shape = len(fields), len(satrecs)
+        return cls(data, fields)
+
+    @classmethod
+    def stack(cls, vectors):
+        """Combine frozen coefficient vectors into columns."""
+        return cls(np.stack(vectors, axis=1), COEFFICIENT_FIELDS)
+
+    def tsince(self, jd, fr):
+        """Return minutes since each epoch, shaped ``(n_sat, n_time)``."""
+        jd = np.asarray(jd, dtype=float)
+        fr = np.asarray(fr, dtype=float)
+        return ((jd - self.jdsatepoch) * minutes_per_day +
+                (fr - self.jdsatepochF) * minutes_per_day)
+
+
+def freeze(satrec):
+    """Return the coefficients of an initialized satellite as a vector.
+
+    The vector is a read-only float64 array laid out as
+    ``COEFFICIENT_FIELDS``, with character flags replaced by their
+    ``FLAG_CODES``.  It holds everything ``propagate()`` needs, so it
+    can be stored, pickled or sent to another process in place of the
+    satellite object.
+
+    """
+    values = list(_coefficient_values(satrec))
+    for i, codes in _flag_positions:
+        values[i] = codes[values[i]]
+    vector = np.fromiter(values, float, len(values))
+    vector.flags.writeable = False
+    return vector
+
+
+def propagate(coefficients, tsince):
+    """Propagate a frozen coefficient vector to an array of times.
+
+    ``coefficients`` is a vector returned by ``freeze()`` and ``tsince``
+    is minutes since the satellite's epoch.  Returns the same error,
+    position and velocity arrays as ``sgp4_near()`` and ``sgp4_deep()``
+    while reading nothing but the vector.
+
+    """
+    record = Columns(coefficients, COEFFICIENT_FIELDS)
+    if record.method:
+        return sgp4_deep(record, tsince)
+    return sgp4_near(record, tsince)
+
+
+def _code(name, value):
+    codes = FLAG_CODES.get(name)
+    if codes is None:
+        return value
+    return codes[value]
+
+
+def sgp4_near(satrec, tsince):
+    """Propagate a near-earth satellite to an array of times.
+
+    ``satrec`` is an initialized satellite whose ``method`` is ``'n'``
+    and ``tsince`` is an array of minutes since its epoch.  Returns an
+    error-code array shaped like ``tsince`` together with position and
+    velocity arrays whose final dimension has length 3.  Unlike the
+    scalar ``sgp4()``, the satellite object is never modified.
+
+    ``satrec`` may instead be a ``Columns`` of near-earth satellites,
+    in which case ``tsince`` should be shaped ``(n_sat, n_time)``.
+
+    """
+    t = np.asarray(tsince, dtype=float)
+
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        return _sgp4(satrec, t, False)
+
+
+def sgp4_deep(satrec, tsince):
+    """Propagate a deep-space satellite to an array of times.
+
+    Like ``sgp4_near()``, but for satellites whose ``method`` is
+    ``'d'``, or a ``Columns`` of them packed with ``DEEP_FIELDS`` that
+    all share the same ``irez``.  The lunar-solar periodics are applied
+    with ``dpper()`` and resonant orbits are integrated by ``dspace()``.
+
+    """
+    t = np.asarray(tsince, dtype=float)
+    irez = np.unique(satrec.irez)
+    if len(irez) > 1:
+        raise ValueError('satellites with different irez resonance flags'
+                         ' must be propagated separately')
+
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        return _sgp4(satrec, t, True, int(irez[0]) if len(irez) else 0)
+
+
+def partition(satrecs):
+    """Group satellites by the code path that propagates them.
+
+    Satellites are keyed by ``method``, ``isimp`` and ``irez``, so that
+    simple-drag and full-drag near-earth orbits, and deep-space orbits
+    without resonance or with one-day or half-day resonance, each land
+    in their own group.  Returns a list of ``(index, columns, kernel)``
+    triples: the positions of the group's satellites in ``satrecs``,
+    their packed ``Columns``, and the routine that propagates them.
+
+    """
+    groups = {}
+    for i, sat in enumerate(satrecs):
+        key = sat.method, sat.isimp, sat.irez
+        groups.setdefault(key, []).append(i)
+
+    result = []
+    for key in sorted(groups):
+        index = np.array(groups[key])
+        members = [satrecs[i] for i in index]
+        if key[0] == 'd':
+            result.append((index, Columns.pack(members, DEEP_FIELDS),
+                           sgp4_deep))
+        else:
+            result.append((index, Columns.pack(members), sgp4_near))
+    return result
+
+
+def partition_columns(columns):
+    """Group the satellites already packed in ``columns``.
+
+    Like ``partition()``, but for a ``Columns`` built by
+    ``Columns.stack()`` from frozen coefficient vectors, so that no
+    satellite objects are needed.  Each group's columns keep the full
+    ``COEFFICIENT_FIELDS`` layout.
+
+    """
+    keys = zip(columns.method[:, 0], columns.isimp[:, 0], columns.irez[:, 0])
+    groups = {}
+    for i, key in enumerate(keys):
+        groups.setdefault(key, []).append(i)
+
+    result = []
+    for key in sorted(groups):
+        index = np.array(groups[key])
+        members = Columns(columns.data[:, index], columns.fields)
+        result.append((index, members, sgp4_deep if key[0] else sgp4_near))
+    return result
+
+
+def sgp4init_array(whichconst, opsmode, epoch, bstar, ndot, nddot, ecco,
+                   argpo, inclo, mo, no_kozai, nodeo):
+    """Initialize many satellites at once from arrays of elements.
+
+    The batch counterpart of ``Satrec.sgp4init()``, without a satellite
+    number: ``whichconst`` and ``opsmode`` apply to every satellite,
+    while the elements are arrays, or scalars that broadcast against
+    them.  Near-earth satellites are initialized with array math;
+    deep-space satellites fall back to ``Satrec.sgp4init()`` one at a
+    time.  Returns a ``Columns`` laid out as ``COEFFICIENT_FIELDS``,
+    ready for ``partition_columns()`` or ``SatrecArray.from_columns()``.
+
+    """
+    from orbit_determination.model import Satrec, gravity_constants
+
+    (tumin, mu, radiusearthkm, xke, j2, j3, j4, j3oj2
+     ) = gravity_constants[whichconst]
+
+    elements = [np.atleast_1d(np.asarray(x, dtype=float)) for x in
+                (epoch, bstar, ndot, nddot, ecco, argpo, inclo, mo,
+                 no_kozai, nodeo)]
+    (epoch, bstar, ndot, nddot, ecco, argpo, inclo, mo, no_kozai, nodeo
+     ) = np.broadcast_arrays(*elements)
+
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        values = _initialize(opsmode, radiusearthkm, xke, j2, j4, j3oj2,
+                             epoch, bstar, ecco, argpo, inclo, mo,
+                             no_kozai, nodeo)
+
+    whole, fraction = np.divmod(epoch, 1.0)
+    values['jdsatepoch'] = whole + 2433281.5
+    values['jdsatepochF'] = [round(f, 8) if round(e, 8) == e else f
+                             for e, f in zip(epoch.tolist(),
+                                             fraction.tolist())]
+    values['radiusearthkm'] = radiusearthkm
+    values['xke'] = xke
+    values['j2'] = j2
+    values['j3oj2'] = j3oj2
+    values['operationmode'] = FLAG_CODES['operationmode'][opsmode]
+
+    data = np.zeros((len(COEFFICIENT_FIELDS), len(epoch)))
+    for i, name in enumerate(COEFFICIENT_FIELDS):
+        if name in values:
+            data[i] = values[name]
+
+    # Deep-space satellites are rare enough to initialize one by one.
+    for i in np.flatnonzero(values['deep']):
+        sat = Satrec()
+        sat.sgp4init(whichconst, opsmode, 0, epoch[i], bstar[i], ndot[i],
+                     nddot[i], ecco[i], argpo[i], inclo[i], mo[i],
+                     no_kozai[i], nodeo[i])
+        data[:, i] = sat.coefficients
+
+    return Columns(data, COEFFICIENT_FIELDS)
+
+
+def _initialize(opsmode, radiusearthkm, xke, j2, j4, j3oj2,
+                epoch, bstar, ecco, argpo, inclo, mo, no_kozai, nodeo):
+
+    ss     = 78.0 / radiusearthkm + 1.0
+    qzms2ttemp = (120.0 - 78.0) / radiusearthkm
+    qzms2t = qzms2ttemp * qzms2ttemp * qzms2ttemp * qzms2ttemp
+
+    #  ------------------------- initl -----------------------------
+    eccsq  = ecco * ecco
+    omeosq = 1.0 - eccsq
+    rteosq = np.sqrt(omeosq)
+    cosio  = np.cos(inclo)
+    cosio2 = cosio * cosio
+    ak     = np.power(xke / no_kozai, x2o3)
+    d1     = 0.75 * j2 * (3.0 * cosio2 - 1.0) / (rteosq * omeosq)
+    del_   = d1 / (ak * ak)
+    adel   = ak * (1.0 - del_ * del_ - del_ *
+             (1.0 / 3.0 + 134.0 * del_ * del_ / 81.0))
+    del_   = d1 / (adel * adel)
+    no_unkozai = no_kozai / (1.0 + del_)
+    ao     = np.power(xke / no_unkozai, x2o3)
+    sinio  = np.sin(inclo)
+    po     = ao * omeosq
+    con42  = 1.0 - 5.0 * cosio2
+    con41  = -con42 - cosio2 - cosio2
+    posq   = po * po
+    rp     = ao * (1.0 - ecco)
+
+    if opsmode == 'a':
+        ts70  = epoch - 7305.0
+        ds70  = (ts70 + 1.0e-8) // 1.0
+        tfrac = ts70 - ds70
+        c1    = 1.72027916940703639e-2
+        thgr70= 1.7321343856509374
+        fk5r  = 5.07551419432269442e-15
+        c1p2p = c1 + twopi
+        gsto  = np.remainder(thgr70 + c1*ds70 + c1p2p*tfrac +
+                             ts70*ts70*fk5r, twopi)
+    else:
+        gsto  = gstime(epoch + 2433281.5)
+
+    #  ---------------------- near-earth terms ----------------------
+    valid  = (omeosq >= 0.0) | (no_unkozai >= 0.0)
+    isimp  = rp < 220.0 / radiusearthkm + 1.0
+    perige = (rp - 1.0) * radiusearthkm
+
+    #  - for perigees below 156 km, s and qoms2t are altered -
+    low    = perige < 156.0
+    slow   = np.where(perige < 98.0, 20.0, perige - 78.0)
+    qzms24temp = (120.0 - slow) / radiusearthkm
+    qzms24 = np.where(low, qzms24temp * qzms24temp * qzms24temp *
+                      qzms24temp, qzms2t)
+    sfour  = np.where(low, slow / radiusearthkm + 1.0, ss)
+
+    pinvsq = 1.0 / posq
+    tsi    = 1.0 / (ao - sfour)
+    eta    = ao * ecco * tsi
+    etasq  = eta * eta
+    eeta   = ecco * eta
+    psisq  = np.fabs(1.0 - etasq)
+    coef   = qzms24 * np.power(tsi, 4.0)
+    coef1  = coef / np.power(psisq, 3.5)
+    cc2    = coef1 * no_unkozai * (ao * (1.0 + 1.5 * etasq + eeta *
+             (4.0 + etasq)) + 0.375 * j2 * tsi / psisq * con41 *
+             (8.0 + 3.0 * etasq * (8.0 + etasq)))
+    cc1    = bstar * cc2
+    eccentric = ecco > 1.0e-4
+    cc3    = np.where(eccentric, -2.0 * coef * tsi * j3oj2 * no_unkozai *
+                      sinio / ecco, 0.0)
+    x1mth2 = 1.0 - cosio2
+    cc4    = 2.0 * no_unkozai * coef1 * ao * omeosq * \
+             (eta * (2.0 + 0.5 * etasq) + ecco *
+             (0.5 + 2.0 * etasq) - j2 * tsi / (ao * psisq) *
+             (-3.0 * con41 * (1.0 - 2.0 * eeta + etasq *
+             (1.5 - 0.5 * eeta)) + 0.75 * x1mth2 *
+             (2.0 * etasq - eeta * (1.0 + etasq)) * np.cos(2.0 * argpo)))
+    cc5    = 2.0 * coef1 * ao * omeosq * (1.0 + 2.75 *
+             (etasq + eeta) + eeta * etasq)
+    cosio4 = cosio2 * cosio2
+    temp1  = 1.5 * j2 * pinvsq * no_unkozai
+    temp2  = 0.5 * temp1 * j2 * pinvsq
+    temp3  = -0.46875 * j4 * pinvsq * pinvsq * no_unkozai
+    mdot   = no_unkozai + 0.5 * temp1 * rteosq * con41 + 0.0625 * \
+             temp2 * rteosq * (13.0 - 78.0 * cosio2 + 137.0 * cosio4)
+    argpdot = (-0.5 * temp1 * con42 + 0.0625 * temp2 *
+               (7.0 - 114.0 * cosio2 + 395.0 * cosio4) +
+               temp3 * (3.0 - 36.0 * cosio2 + 49.0 * cosio4))
+    xhdot1 = -temp1 * cosio
+    nodedot = xhdot1 + (0.5 * temp2 * (4.0 - 19.0 * cosio2) +
+                        2.0 * temp3 * (3.0 - 7.0 * cosio2)) * cosio
+    omgcof = bstar * cc3 * np.cos(argpo)
+    xmcof  = np.where(eccentric, -x2o3 * coef * bstar / eeta, 0.0)
+    nodecf = 3.5 * omeosq * xhdot1 * cc1
+    t2cof  = 1.5 * cc1
+    #  sgp4fix for divide by zero with xinco = 180 deg
+    temp   = -0.25 * j3oj2 * sinio * (3.0 + 5.0 * cosio)
+    xlcof  = np.where(np.fabs(cosio + 1.0) > 1.5e-12, temp / (1.0 + cosio),
+                      temp / temp4)
+    aycof  = -0.5 * j3oj2 * sinio
+    delmotemp = 1.0 + eta * np.cos(mo)
+    delmo  = delmotemp * delmotemp * delmotemp
+    sinmao = np.sin(mo)
+    x7thm1 = 7.0 * cosio2 - 1.0
+
+    #  ---------------- full drag for higher perigees ----------------
+    full   = valid & ~isimp
+    cc1sq  = cc1 * cc1
+    d2     = 4.0 * ao * tsi * cc1sq
+    temp   = d2 * tsi * cc1 / 3.0
+    d3     = (17.0 * ao + sfour) * temp
+    d4     = 0.5 * temp * ao * tsi * (221.0 * ao + 31.0 * sfour) * cc1
+    t3cof  = d2 + 2.0 * cc1sq
+    t4cof  = 0.25 * (3.0 * d3 + cc1 * (12.0 * d2 + 10.0 * cc1sq))
+    t5cof  = 0.2 * (3.0 * d4 + 12.0 * cc1 * d3 + 6.0 * d2 * d2 +
+                    15.0 * cc1sq * (2.0 * d2 + cc1sq))
+
+    values = dict(
+        argpdot=argpdot, aycof=aycof, cc1=cc1, cc4=cc4, cc5=cc5, con41=con41,
+        delmo=delmo, eta=eta, isimp=isimp, mdot=mdot, nodecf=nodecf,
+        nodedot=nodedot, omgcof=omgcof, sinmao=sinmao, t2cof=t2cof,
+        x1mth2=x1mth2, x7thm1=x7thm1, xlcof=xlcof, xmcof=xmcof,
+    )
+    for name, value in values.items():
+        values[name] = np.where(valid, value, 0.0)
+    for name, value in dict(d2=d2, d3=d3, d4=d4, t3cof=t3cof,
+                            t4cof=t4cof, t5cof=t5cof).items():
+        values[name] = np.where(full, value, 0.0)
+
+    values.update(argpo=argpo, bstar=bstar, ecco=ecco, gsto=gsto,
+                  inclo=inclo, mo=mo, no_unkozai=no_unkozai, nodeo=nodeo)
+    values['deep'] = valid & (2*pi / no_unkozai >= 225.0)
+    return values
+
+
+def gstime(jdut1, fr=0.0):
+    """Return Greenwich sidereal time in radians for UT1 Julian dates.
+
+    ``jdut1`` may be an array, optionally split into whole dates and a
+    fraction ``fr`` that keeps the time of day at full precision.  With
+    ``fr`` omitted the result matches ``propagation.gstime()``.
+
+    """
+    tut1 = (jdut1 - 2451545.0 + fr) / 36525.0
+    temp = -6.2e-6* tut1 * tut1 * tut1 + 0.093104 * tut1 * tut1 + \
+            (876600.0*3600 + 8640184.812866) * tut1 + 67310.54841  #  sec
+    return np.remainder(temp * deg2rad / 240.0, twopi)
+
+
+def _sgp4(satrec, t, deep, irez=0):
+
+    vkmpersec = satrec.radiusearthkm * satrec.xke / 60.0
+
+    #  ------- update for secular gravity and atmospheric drag -----
+    xmdf    = satrec.mo + satrec.mdot * t
+    argpdf  = satrec.argpo + satrec.argpdot * t
+    nodedf  = satrec.nodeo + satrec.nodedot * t
+    argpm   = argpdf
+    mm      = xmdf
+    t2      = t * t
+    nodem   = nodedf + satrec.nodecf * t2
+    tempa   = 1.0 - satrec.cc1 * t
+    tempe   = satrec.bstar * satrec.cc4 * t
+    templ   = satrec.t2cof * t2
+
+    # isimp may be a column that mixes simple and full drag satellites
+    simple = satrec.isimp == 1
+    if not np.all(simple):
+
+        delomg   = satrec.omgcof * t
+        delmtemp = 1.0 + satrec.eta * np.cos(xmdf)
+        delm     = satrec.xmcof * \
+                   (delmtemp * delmtemp * delmtemp - satrec.delmo)
+        temp     = delomg + delm
+        mmfull   = xmdf + temp
+        t3       = t2 * t
+        t4       = t3 * t
+        mm       = np.where(simple, mm, mmfull)
+        argpm    = np.where(simple, argpm, argpdf - temp)
+        tempa    = np.where(simple, tempa, tempa - satrec.d2 * t2 -
+                            satrec.d3 * t3 - satrec.d4 * t4)
+        tempe    = np.where(simple, tempe, tempe + satrec.bstar *
+                            satrec.cc5 * (np.sin(mmfull) - satrec.sinmao))
+        templ    = np.where(simple, templ, templ + satrec.t3cof * t3 +
+                            t4 * (satrec.t4cof + t * satrec.t5cof))
+
+    nm    = satrec.no_unkozai
+    em    = satrec.ecco
+    inclm = satrec.inclo
+
+    if deep:
+        em, argpm, inclm, mm, nodem, nm = dspace(
+            satrec, irez, t, em, argpm, inclm, mm, nodem, nm)
+
+    error2 = np.broadcast_to(nm <= 0.0, t.shape)
+
+    am = np.power(satrec.xke / nm, x2o3) * tempa * tempa
+    nm = satrec.xke / np.power(am, 1.5)
+    em = em - tempe
+
+    error1 = (em >= 1.0) | (em < -0.001)
+
+    #  sgp4fix fix tolerance to avoid a divide by zero
+    em     = np.where(em < 1.0e-6, 1.0e-6, em)
+    mm     = mm + satrec.no_unkozai * templ
+    xlm    = mm + argpm + nodem
+
+    nodem  = np.fmod(nodem, twopi)
+    argpm  = np.remainder(argpm, twopi)
+    xlm    = np.remainder(xlm, twopi)
+    mm     = np.remainder(xlm - argpm - nodem, twopi)
+
+    #  ----------------- compute extra mean quantities -------------
+    sinip = np.sin(inclm)
+    cosip = np.cos(inclm)
+
+    #  -------------------- add lunar-solar periodics --------------
+    ep    = em
+    xincp = inclm
+    argpp = argpm
+    nodep = nodem
+    mp    = mm
+    error3 = None
+    aycof  = satrec.aycof
+    xlcof  = satrec.xlcof
+    con41  = satrec.con41
+    x1mth2 = satrec.x1mth2
+    x7thm1 = satrec.x7thm1
+
+    if deep:
+
+        ep, xincp, nodep, argpp, mp = dpper(satrec, t, ep, xincp, nodep,
+                                            argpp, mp)
+        negative = xincp < 0.0
+        xincp = np.where(negative, -xincp, xincp)
+        nodep = np.where(negative, nodep + pi, nodep)
+        argpp = np.where(negative, argpp - pi, argpp)
+
+        error3 = (ep < 0.0) | (ep > 1.0)
+
+        #  -------------------- long period periodics ------------------
+        sinip  = np.sin(xincp)
+        cosip  = np.cos(xincp)
+        aycof  = -0.5*satrec.j3oj2*sinip
+        #  sgp4fix for divide by zero for xincp = 180 deg
+        temp   = -0.25 * satrec.j3oj2 * sinip * (3.0 + 5.0 * cosip)
+        xlcof  = np.where(np.fabs(cosip+1.0) > 1.5e-12,
+                          temp / (1.0 + cosip), temp / temp4)
+
+        cosisq = cosip * cosip
+        con41  = 3.0*cosisq - 1.0
+        x1mth2 = 1.0 - cosisq
+        x7thm1 = 7.0*cosisq - 1.0
+
+    axnl = ep * np.cos(argpp)
+    temp = 1.0 / (am * (1.0 - ep * ep))
+    aynl = ep * np.sin(argpp) + temp * aycof
+    xl   = mp + argpp + nodep + temp * xlcof * axnl
+
+    #  --------------------- solve kepler's equation ---------------
+    u = np.remainder(xl - nodep, twopi)
+    eo1, sineo1, coseo1, ktr = solve_kepler(u, axnl, aynl)
+
+    #  ------------- short period preliminary quantities -----------
+    ecose = axnl*coseo1 + aynl*sineo1
+    esine = axnl*sineo1 - aynl*coseo1
+    el2   = axnl*axnl + aynl*aynl
+    pl    = am*(1.0-el2)
+
+    error4 = pl < 0.0
+
+    rl     = am * (1.0 - ecose)
+    rdotl  = np.sqrt(am) * esine/rl
+    rvdotl = np.sqrt(pl) / rl
+    betal  = np.sqrt(1.0 - el2)
+    temp   = esine / (1.0 + betal)
+    sinu   = am / rl * (sineo1 - aynl - axnl * temp)
+    cosu   = am / rl * (coseo1 - axnl + aynl * temp)
+    su     = np.arctan2(sinu, cosu)
+    sin2u  = (cosu + cosu) * sinu
+    cos2u  = 1.0 - 2.0 * sinu * sinu
+    temp   = 1.0 / pl
+    temp1  = 0.5 * satrec.j2 * temp
+    temp2  = temp1 * temp
+
+    #  -------------- update for short period periodics ------------
+    mrt   = rl * (1.0 - 1.5 * temp2 * betal * con41) + \
+            0.5 * temp1 * x1mth2 * cos2u
+    su    = su - 0.25 * temp2 * x7thm1 * sin2u
+    xnode = nodep + 1.5 * temp2 * cosip * sin2u
+    xinc  = xincp + 1.5 * temp2 * cosip * sinip * cos2u
+    mvt   = rdotl - nm * temp1 * x1mth2 * sin2u / satrec.xke
+    rvdot = rvdotl + nm * temp1 * (x1mth2 * cos2u +
+            1.5 * con41) / satrec.xke
+
+    #  --------------------- orientation vectors -------------------
+    sinsu =  np.sin(su)
+    cossu =  np.cos(su)
+    snod  =  np.sin(xnode)
+    cnod  =  np.cos(xnode)
+    sini  =  np.sin(xinc)
+    cosi  =  np.cos(xinc)
+    xmx   = -snod * cosi
+    xmy   =  cnod * cosi
+    ux    =  xmx * sinsu + cnod * cossu
+    uy    =  xmy * sinsu + snod * cossu
+    uz    =  sini * sinsu
+    vx    =  xmx * cossu - cnod * sinsu
+    vy    =  xmy * cossu - snod * sinsu
+    vz    =  sini * cossu
+
+    #  --------- position and velocity (in km and km/sec) ----------
+    _mr = mrt * satrec.radiusearthkm
+    r = np.stack((_mr * ux, _mr * uy, _mr * uz), axis=-1)
+    v = np.stack(((mvt * ux + rvdot * vx) * vkmpersec,
+                  (mvt * uy + rvdot * vy) * vkmpersec,
+                  (mvt * uz + rvdot * vz) * vkmpersec), axis=-1)
+
+    #  sgp4fix for decaying satellites
+    return _errors(t.shape, r, v, mrt < 1.0, error4, error1, error2, error3)
+
+
+def dspace(satrec, irez, t, em, argpm, inclm, mm, nodem, nm):
+    """Apply the deep-space secular and resonance terms over arrays.
+
+    This is the array form of ``_dspace``.  ``irez`` must be the common
+    resonance flag of the satellite or columns in ``satrec``.  For a
+    resonant orbit, the integrator states at each whole 720-minute step
+    are computed once per satellite, only as far as the latest time
+    requested, in the same way as the checkpoint tables of the scalar
+    routine; each time then picks up the state at which the scalar
+    integration loop would have stopped.  Returns the updated
+    ``em, argpm, inclm, mm, nodem, nm``.
+
+    """
+    rptim = 4.37526908801129966e-3  # equates to 7.29211514668855e-5 rad/sec
+    stepp = 720.0
+    stepn = -720.0
+
+    #  ----------- calculate deep space resonance effects -----------
+    em    = em + satrec.dedt * t
+    inclm = inclm + satrec.didt * t
+    argpm = argpm + satrec.domdt * t
+    nodem = nodem + satrec.dnodt * t
+    mm    = mm + satrec.dmdt * t
+
+    if irez == 0:
+        return em, argpm, inclm, mm, nodem, nm
+
+    theta = np.remainder(satrec.gsto + t * rptim, twopi)
+    forward = t > 0.0
+    delt = np.where(forward, stepp, stepn)
+
+    # the step at which the scalar loop stops: the first k with
+    # |t - k * delt| < stepp, found from a safe lower bound
+    steps = np.fabs(t) / stepp
+    steps = np.where(np.isfinite(steps), steps, 0.0)
+    k = np.maximum(np.floor(steps) - 1.0, 0.0).astype(int)
+    for _ in range(3):
+        k += np.fabs(t - k * delt) >= stepp
+
+    # integrator states at every step, for every satellite
+    shape = np.shape(satrec.xlamo)
+    sat = np.broadcast_to(np.arange(int(np.prod(shape))).reshape(shape),
+                          t.shape)
+    xli = np.empty(t.shape)
+    xni = np.empty(t.shape)
+    for direction, step in ((forward, stepp), (~forward, stepn)):
+        if not direction.any():
+            continue
+        kmax = int(k[direction].max())
+        li, ni = _resonance_table(satrec, irez, step, kmax)
+        xli[direction] = li[sat[direction], k[direction]]
+        xni[direction] = ni[sat[direction], k[direction]]
+
+    atime = k * delt
+    xndt, xldot, xnddt = _resonance_rates(satrec, irez, atime, xli, xni)
+    ft = t - atime
+
+    nm = xni + xndt * ft + xnddt * ft * ft * 0.5
+    xl = xli + xldot * ft + xndt * ft * ft * 0.5
+    if irez != 1:
+        mm   = xl - 2.0 * nodem + 2.0 * theta
+    else:
+        mm   = xl - nodem - argpm + theta
+    dndt = nm - satrec.no_unkozai
+    nm = satrec.no_unkozai + dndt
+
+    return em, argpm, inclm, mm, nodem, nm
+
+
+def _resonance_table(satrec, irez, delt, kmax):
+    """Integrate the resonance terms from epoch through ``kmax`` steps.
+
+    Returns two arrays shaped ``(n_sat, kmax + 1)`` holding ``xli`` and
+    ``xni`` at ``atime = k * delt``.
+
+    """
+    step2 = 259200.0
+    xli = satrec.xlamo + np.zeros(np.shape(satrec.xlamo))
+    xni = satrec.no_unkozai + np.zeros(np.shape(satrec.xlamo))
+    li = [xli]
+    ni = [xni]
+    for k in range(kmax):
+        xndt, xldot, xnddt = _resonance_rates(satrec, irez, k * delt, xli, xni)
+        xli = xli + xldot * delt + xndt * step2
+        xni = xni + xndt * delt + xnddt * step2
+        li.append(xli)
+        ni.append(xni)
+    li = np.stack(li, axis=-1).reshape(-1, kmax + 1)
+    ni = np.stack(ni, axis=-1).reshape(-1, kmax + 1)
+    return li, ni
+
+
+def _resonance_rates(satrec, irez, atime, xli, xni):
+    """Return the ``xndt, xldot, xnddt`` dot terms of ``_dspace``."""
+    fasx2 = 0.13130908
+    fasx4 = 2.8843198
+    fasx6 = 0.37448087
+    g22   = 5.7686396
+    g32   = 0.95240898
+    g44   = 1.8014998
+    g52   = 1.0508330
+    g54   = 4.4108898
+
+    if irez != 2:
+
+        #  ----------- near - synchronous resonance terms -------
+        xndt  = satrec.del1 * np.sin(xli - fasx2) + \
+                satrec.del2 * np.sin(2.0 * (xli - fasx4)) + \
+                satrec.del3 * np.sin(3.0 * (xli - fasx6))
+        xldot = xni + satrec.xfact
+        xnddt = satrec.del1 * np.cos(xli - fasx2) + \
+                2.0 * satrec.del2 * np.cos(2.0 * (xli - fasx4)) + \
+                3.0 * satrec.del3 * np.cos(3.0 * (xli - fasx6))
+        xnddt = xnddt * xldot
+
+    else:
+
+        # --------- near - half-day resonance terms --------
+        xomi  = satrec.argpo + satrec.argpdot * atime
+        x2omi = xomi + xomi
+        x2li  = xli + xli
+        xndt  = (satrec.d2201 * np.sin(x2omi + xli - g22) +
+                 satrec.d2211 * np.sin(xli - g22) +
+                 satrec.d3210 * np.sin(xomi + xli - g32) +
+                 satrec.d3222 * np.sin(-xomi + xli - g32) +
+                 satrec.d4410 * np.sin(x2omi + x2li - g44) +
+                 satrec.d4422 * np.sin(x2li - g44) +
+                 satrec.d5220 * np.sin(xomi + xli - g52) +
+                 satrec.d5232 * np.sin(-xomi + xli - g52) +
+                 satrec.d5421 * np.sin(xomi + x2li - g54) +
+                 satrec.d5433 * np.sin(-xomi + x2li - g54))
+        xldot = xni + satrec.xfact
+        xnddt = (satrec.d2201 * np.cos(x2omi + xli - g22) +
+                 satrec.d2211 * np.cos(xli - g22) +
+                 satrec.d3210 * np.cos(xomi + xli - g32) +
+                 satrec.d3222 * np.cos(-xomi + xli - g32) +
+                 satrec.d5220 * np.cos(xomi + xli - g52) +
+                 satrec.d5232 * np.cos(-xomi + xli - g52) +
+                 2.0 * (satrec.d4410 * np.cos(x2omi + x2li - g44) +
+                 satrec.d4422 * np.cos(x2li - g44) +
+                 satrec.d5421 * np.cos(xomi + x2li - g54) +
+                 satrec.d5433 * np.cos(-xomi + x2li - g54)))
+        xnddt = xnddt * xldot
+
+    return xndt, xldot, xnddt
+
+
+def dpper(satrec, t, ep, inclp, nodep, argpp, mp):
+    """Apply the deep-space lunar-solar periodics over arrays.
+
+    This is the array form of ``_dpper`` for an already initialized
+    satellite (``init == 'n'``).  ``satrec`` is a single satellite or a
+    ``Columns`` packed with ``DEEP_FIELDS``; ``t`` holds minutes since
+    epoch, either a time vector or a satellites-by-times grid, and the
+    mean elements must broadcast against it.  Returns the corrected
+    ``ep, inclp, nodep, argpp, mp`` arrays.  Elements with an
+    inclination below 0.2 rad receive the Lyddane modification, as in
+    the scalar routine.
+
+    """
+    #  ---------------------- constants -----------------------------
+    zns   = 1.19459e-5
+    zes   = 0.01675
+    znl   = 1.5835218e-4
+    zel   = 0.05490
+
+    #  --------------- calculate time varying periodics -----------
+    zm    = satrec.zmos + zns * t
+    zf    = zm + 2.0 * zes * np.sin(zm)
+    sinzf = np.sin(zf)
+    f2    =  0.5 * sinzf * sinzf - 0.25
+    f3    = -0.5 * sinzf * np.cos(zf)
+    ses   = satrec.se2 * f2 + satrec.se3 * f3
+    sis   = satrec.si2 * f2 + satrec.si3 * f3
+    sls   = satrec.sl2 * f2 + satrec.sl3 * f3 + satrec.sl4 * sinzf
+    sghs  = satrec.sgh2 * f2 + satrec.sgh3 * f3 + satrec.sgh4 * sinzf
+    shs   = satrec.sh2 * f2 + satrec.sh3 * f3
+
+    zm    = satrec.zmol + znl * t
+    zf    = zm + 2.0 * zel * np.sin(zm)
+    sinzf = np.sin(zf)
+    f2    =  0.5 * sinzf * sinzf - 0.25
+    f3    = -0.5 * sinzf * np.cos(zf)
+    sel   = satrec.ee2 * f2 + satrec.e3 * f3
+    sil   = satrec.xi2 * f2 + satrec.xi3 * f3
+    sll   = satrec.xl2 * f2 + satrec.xl3 * f3 + satrec.xl4 * sinzf
+    sghl  = satrec.xgh2 * f2 + satrec.xgh3 * f3 + satrec.xgh4 * sinzf
+    shll  = satrec.xh2 * f2 + satrec.xh3 * f3
+
+    pe    = ses + sel - satrec.peo
+    pinc  = sis + sil - satrec.pinco
+    pl    = sls + sll - satrec.plo
+    pgh   = sghs + sghl - satrec.pgho
+    ph    = shs + shll - satrec.pho
+    inclp = inclp + pinc
+    ep    = ep + pe
+    sinip = np.sin(inclp)
+    cosip = np.cos(inclp)
+
+    # 기본 적용 (inclination >= 0.2 rad)
+    direct = inclp >= 0.2
+    phd    = ph / sinip
+    pghd   = pgh - cosip * phd
+    argpd  = argpp + pghd
+    noded  = nodep + phd
+
+    if not np.all(direct):
+
+        # Lyddane 보정법 적용 (inclination < 0.2 rad)
+        afspc  = _afspc(satrec)
+        sinop  = np.sin(nodep)
+        cosop  = np.cos(nodep)
+        alfdp  = sinip * sinop
+        betdp  = sinip * cosop
+        dalf   =  ph * cosop + pinc * cosip * sinop
+        dbet   = -ph * sinop + pinc * cosip * cosop
+        alfdp  = alfdp + dalf
+        betdp  = betdp + dbet
+        nodel  = np.fmod(nodep, twopi)
+        nodel  = np.where((nodel < 0.0) & afspc, nodel + twopi, nodel)
+        xls    = mp + argpp + pl + pgh + (cosip - pinc * sinip) * nodel
+        xnoh   = nodel
+        nodel  = np.arctan2(alfdp, betdp)
+        nodel  = np.where((nodel < 0.0) & afspc, nodel + twopi, nodel)
+        nodel  = np.where(np.fabs(xnoh - nodel) > pi,
+                          np.where(nodel < xnoh, nodel + twopi,
+                                   nodel - twopi), nodel)
+        argpl  = xls - (mp + pl) - cosip * nodel
+
+        argpd  = np.where(direct, argpd, argpl)
+        noded  = np.where(direct, noded, nodel)
+
+    return ep, inclp, noded, argpd, mp + pl
+
+
+def _afspc(satrec):
+    """Return whether a satellite or column runs in AFSPC mode 'a'."""
+    mode = satrec.operationmode
+    if isinstance(mode, str):
+        return mode == 'a'
+    return mode == FLAG_CODES['operationmode']['a']
+
+
+def solve_kepler(u, axnl, aynl):
+    """Solve the modified Kepler equation of ``sgp4()`` over arrays.
+
+    ``u``, ``axnl`` and ``aynl`` may be any mutually broadcastable
+    arrays.  Every element follows the scalar Newton iteration: a
+    correction is clamped to 0.95 rad, and an element stops once its
+    correction falls below 1e-12 or after 10 iterations.  Converged
+    elements are dropped from the working set, so the remaining
+    iterations only cost as much as the elements still moving; a few
+    highly eccentric orbits in a batch do not make the rest recompute.
+
+    Returns ``eo1``, ``sineo1``, ``coseo1`` and ``iterations`` arrays.
+    As in the scalar loop, the sine and cosine are those evaluated at
+    the start of each element's final iteration, before its last
+    correction was applied.
+
+    """
+    u, axnl, aynl = np.broadcast_arrays(u, axnl, aynl)
+    shape = u.shape
+    u = u.ravel()
+    axnl = axnl.ravel()
+    aynl = aynl.ravel()
+
+    eo1 = u.copy()
+    sineo1 = np.empty_like(eo1)
+    coseo1 = np.empty_like(eo1)
+    iterations = np.zeros(eo1.shape, dtype=int)
+
+    # 아직 수렴하지 않은 원소(lane)만 압축해서 반복
+    lanes = np.arange(eo1.size)
+    uk, axk, ayk, ek = u, axnl, aynl, eo1
+
+    #    sgp4fix for kepler iteration
+    #    the following iteration needs better limits on corrections
+    for ktr in range(1, 11):
+        sinek = np.sin(ek)
+        cosek = np.cos(ek)
+        tem5  = 1.0 - cosek * axk - sinek * ayk
+        tem5  = (uk - ayk * cosek + axk * sinek - ek) / tem5
+        tem5  = np.where(np.fabs(tem5) >= 0.95,
+                         np.where(tem5 > 0.0, 0.95, -0.95), tem5)
+        ek    = ek + tem5
+
+        sineo1[lanes] = sinek
+        coseo1[lanes] = cosek
+        eo1[lanes] = ek
+        iterations[lanes] = ktr
+
+        moving = np.fabs(tem5) >= 1.0e-12
+        if not moving.any():
+            break
+        if not moving.all():
+            lanes = lanes[moving]
+            uk, axk, ayk, ek = uk[moving], axk[moving], ayk[moving], ek[moving]
+
+    return (eo1.reshape(shape), sineo1.reshape(shape),
+            coseo1.reshape(shape), iterations.reshape(shape))
+
+
+def _errors(shape, r, v, error6, error4, error1, error2, error3=None):
+    """Build the error-code array and blank out failed positions.
+
+    Codes are assigned from the lowest to the highest priority so that
+    each element carries the code the scalar ``sgp4()`` would have
+    returned first.  Elements with codes 1 through 4 get NaN vectors,
+    while code 6 (decayed) keeps its position like the scalar routine.
+
+    """
+    e = np.zeros(shape, dtype=int)
+    e[np.broadcast_to(error6, shape)] = 6
+    e[np.broadcast_to(error4, shape)] = 4
+    if error3 is not None:
+        e[np.broadcast_to(error3, shape)] = 3
+    e[np.broadcast_to(error1, shape)] = 1
+    e[np.broadcast_to(error2, shape)] = 2
+
+    failed = (e != 0) & (e != 6)
+    r[failed] = np.nan
+    v[failed] = np.nan
+    return e, r, v